@@ -0,0 +1,137 @@
+import os, sqlite3, logging, datetime
+from config import DB_FILE, DB_BATCH_SIZE
+from valeurs_deces import to_null, to_date
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Table des décès (schéma du README) et table de suivi des fichiers sources chargés
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deces (
+    id INTEGER PRIMARY KEY,
+    nom TEXT,
+    prenoms TEXT,
+    sexe INTEGER,
+    date_naissance DATE,
+    CP_naissance TEXT,
+    commune_naissance TEXT,
+    pays_naissance TEXT,
+    date_deces DATE,
+    lieu_deces TEXT,
+    acte_deces TEXT,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deces_source ON deces(source);
+CREATE TABLE IF NOT EXISTS fichiers_charges (
+    source TEXT PRIMARY KEY,
+    taille INTEGER,
+    lignes INTEGER,
+    charge_le TEXT
+);
+"""
+
+# Index secondaires, construits après le chargement
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_deces_nom_naissance ON deces(nom, date_naissance);
+CREATE INDEX IF NOT EXISTS idx_deces_date_deces ON deces(date_deces);
+"""
+
+# Pragmas de chargement en masse : journal WAL, écritures non synchronisées à chaque commit, cache de 200 Mo
+PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -200000;
+"""
+
+INSERT = """
+INSERT INTO deces (nom, prenoms, sexe, date_naissance, CP_naissance, commune_naissance,
+                   pays_naissance, date_deces, lieu_deces, acte_deces, source)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def connect(db_file=DB_FILE):
+    """Ouvre la base SQLite, avec les pragmas de chargement et le schéma créé si besoin."""
+    connection = sqlite3.connect(db_file)
+    connection.executescript(PRAGMAS)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def to_iso_date(date_texte):
+    """Convertit une date AAAAMMJJ en date ISO AAAA-MM-JJ, ou None si elle est incomplète ou invalide."""
+    date = to_date(date_texte)
+    return date.isoformat() if date else None
+
+
+def to_row(data, source):
+    """Transforme une donnée du parser en ligne de la table deces."""
+    valeur = lambda key: to_null(data[key])
+    return (
+        valeur("nom"), valeur("prénoms"), int(data["sexe"]), to_iso_date(data["date_naissance"]),
+        data["CP_naissance"], valeur("commune_naissance"), valeur("pays_naissance"),
+        to_iso_date(data["date_deces"]), data["CP_deces"], data["acte_deces"], source,
+    )
+
+
+def is_loaded(connection, source, taille=None):
+    """Indique si un fichier source a déjà été chargé (avec la même taille si elle est donnée)."""
+    row = connection.execute("SELECT taille FROM fichiers_charges WHERE source = ?", (source,)).fetchone()
+    return row is not None and (taille is None or row[0] == taille)
+
+
+def tee_database(data_iter, source, taille=None, db_file=DB_FILE, batch_size=DB_BATCH_SIZE):
+    """
+    Charge les données dans la base au passage et les renvoie telles quelles.
+
+    Les lignes sont insérées par lots de batch_size, un commit par lot. Les lignes d'un chargement
+    précédent du même fichier source (interrompu ou fichier corrigé) sont d'abord supprimées, et le
+    fichier n'est enregistré comme chargé qu'à la fin : un nouveau lancement reprend proprement.
+    Les index secondaires sont construits après le chargement.
+    """
+    connection = connect(db_file)
+    try:
+        with connection:
+            connection.execute("DELETE FROM deces WHERE source = ?", (source,)) # chargement idempotent par fichier source
+            connection.execute("DELETE FROM fichiers_charges WHERE source = ?", (source,))
+        batch, lignes = [], 0
+        for data in data_iter:
+            batch.append(to_row(data, source))
+            if len(batch) >= batch_size: # lot complet : une transaction par lot
+                with connection:
+                    connection.executemany(INSERT, batch)
+                lignes += len(batch)
+                batch = []
+            yield data
+        with connection: # dernier lot et enregistrement du fichier chargé dans la même transaction
+            connection.executemany(INSERT, batch)
+            lignes += len(batch)
+            connection.execute(
+                "INSERT INTO fichiers_charges (source, taille, lignes, charge_le) VALUES (?, ?, ?, ?)",
+                (source, taille, lignes, datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+        connection.executescript(INDEXES) # index secondaires construits après le chargement
+        logging.info(f"✅ Chargé en base : {lignes} lignes de {source} dans {db_file}")
+    finally:
+        connection.close()
+
+
+def load_file(FILE, FILE_PATH, db_file=DB_FILE, batch_size=DB_BATCH_SIZE):
+    """
+    Charge un fichier source dans la base, s'il n'y est pas déjà.
+
+    Un fichier déjà chargé avec la même taille est ignoré sans être relu.
+
+    :return: Nombre de lignes chargées, ou 0 si le fichier était déjà chargé.
+    """
+    from pipeline_deces import iter_data_from_file # import local : pipeline_deces peut utiliser ce module
+    taille = os.path.getsize(FILE_PATH)
+    connection = connect(db_file)
+    try:
+        deja_charge = is_loaded(connection, FILE, taille)
+    finally:
+        connection.close()
+    if deja_charge:
+        logging.info(f"🔄 Déjà chargé en base : {FILE}")
+        return 0
+    return sum(1 for _ in tee_database(iter_data_from_file(FILE_PATH), FILE, taille, db_file, batch_size))
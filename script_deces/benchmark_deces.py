@@ -0,0 +1,230 @@
+import os, sys, json, time, logging, platform, resource, tempfile, threading, tracemalloc, datetime
+from contextlib import ExitStack
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from config import DOWNLOAD_DIR, BENCHMARK_DIR, BENCHMARK_TOLERANCE
+from generator_deces import generate_file
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Étapes mesurées, dans l'ordre d'exécution
+ETAPES = ["parse", "parse_colonnes", "json", "comptage", "csv", "flux", "parallele", "telechargement"]
+# Étapes mesurées mais exclues de la comparaison : comptage ne fait qu'afficher les compteurs collectés
+# pendant la lecture (quelques dixièmes de milliseconde), son débit n'est que du bruit
+ETAPES_NON_COMPAREES = {"comptage"}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serveur de fichiers local, sans journal des requêtes."""
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(fonction, lignes, memoire=True):
+    """
+    Mesure une étape : durée, temps CPU, lignes par seconde et, si memoire, pic de mémoire Python.
+
+    Le pic de mémoire est mesuré par une seconde exécution sous tracemalloc, pour ne pas fausser la durée.
+
+    :param fonction: Fonction sans argument exécutant l'étape, appelée une ou deux fois.
+    :param lignes: Nombre de lignes (ou d'octets pour le téléchargement) traitées par l'étape.
+    :return: Tuple (résultat de la première exécution, mesures).
+    """
+    debut, debut_cpu = time.perf_counter(), time.process_time()
+    resultat = fonction()
+    secondes, cpu = time.perf_counter() - debut, time.process_time() - debut_cpu
+    mesures = {
+        "secondes": round(secondes, 4),
+        "cpu_secondes": round(cpu, 4),
+        "lignes_par_seconde": round(lignes / secondes) if secondes else None,
+    }
+    if memoire:
+        tracemalloc.start()
+        try:
+            fonction()
+            mesures["pic_memoire_mo"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        finally:
+            tracemalloc.stop()
+    return resultat, mesures
+
+
+def serve_directory(directory):
+    """Démarre un serveur HTTP local sur un port libre, servant le dossier donné."""
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur
+
+
+def run_benchmark(lines, seed=0, etapes=ETAPES, memoire=True, workdir=None):
+    """
+    Génère un fichier synthétique de lines lignes et mesure chaque étape du pipeline.
+
+    Les étapes parse, json, comptage et csv sont celles de pipeline() en mode "liste" ; flux et parallele
+    mesurent les pipelines complets des autres modes, telechargement mesure script_deces.download_file
+    depuis un serveur HTTP local. Les fichiers sont écrits dans workdir (par défaut un dossier temporaire).
+
+    :return: Dictionnaire des résultats (contexte de la mesure et mesures par étape).
+    """
+    cwd = os.getcwd()
+    with ExitStack() as stack:
+        if workdir is None: # dossier temporaire supprimé à la fin des mesures
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        workdir = os.path.abspath(workdir)
+        os.makedirs(os.path.join(workdir, DOWNLOAD_DIR), exist_ok=True)
+        os.chdir(workdir) # les sorties du pipeline vont dans le DOWNLOAD_DIR du dossier de travail
+        try:
+            return _run_stages(lines, seed, etapes, memoire, workdir)
+        finally:
+            os.chdir(cwd)
+
+
+def _run_stages(lines, seed, etapes, memoire, workdir):
+    from pipeline_deces import (extract_data_from_file, download_datas, log_counters, json_to_csv,
+                                pipeline_streaming, init_counters)
+    from quarantine_deces import QuarantineWriter
+
+    FILE = "deces-2024-m01.txt"
+    FILE_PATH = DOWNLOAD_DIR + '/' + FILE
+    debut = time.perf_counter()
+    generate_file(FILE_PATH, lines, seed)
+    taille = os.path.getsize(FILE_PATH)
+    logging.info(f"✅ Fichier synthétique : {FILE_PATH} ({lines} lignes, {taille} octets, {time.perf_counter() - debut:.1f} s)")
+
+    def parse(engine):
+        counters = init_counters()
+        with QuarantineWriter(counters=counters) as quarantine: # rejets comptés, sans fichier de quarantaine
+            return extract_data_from_file(FILE_PATH, engine, counters, quarantine), counters
+
+    resultats = {}
+    data_list = counters = None
+    niveau = logging.root.manager.disable
+    logging.disable(logging.INFO) # les messages des étapes fausseraient les mesures
+    try:
+        for etape in etapes:
+            if etape == "parse":
+                (data_list, counters), resultats[etape] = measure(lambda: parse("regex"), lines, memoire)
+            elif etape == "parse_colonnes":
+                _, resultats[etape] = measure(lambda: parse("colonnes"), lines, memoire)
+            elif etape in ("json", "comptage", "csv"):
+                if data_list is None:
+                    data_list, counters = parse("regex")
+                fonction = {
+                    "json": lambda: download_datas(data_list, FILE),
+                    "comptage": lambda: log_counters(counters, FILE_PATH),
+                    "csv": lambda: json_to_csv(data_list, FILE_PATH),
+                }[etape]
+                _, resultats[etape] = measure(fonction, lines, memoire)
+            elif etape == "flux":
+                _, resultats[etape] = measure(lambda: pipeline_streaming(FILE, FILE_PATH), lines, memoire)
+            elif etape == "parallele":
+                from parallel_deces import pipeline_parallel
+                # mémoire mesurée dans le processus principal seulement (fusion des morceaux)
+                _, resultats[etape] = measure(lambda: pipeline_parallel(FILE, FILE_PATH), lines, memoire)
+            elif etape == "telechargement":
+                resultats[etape] = measure_download(FILE_PATH, taille, lines, memoire, workdir)
+            else:
+                raise ValueError(f"Étape inconnue : {etape}")
+    finally:
+        logging.disable(niveau)
+
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "lignes": lines,
+        "octets": taille,
+        "graine": seed,
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "pic_rss_mo": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2), # ru_maxrss en Ko sous Linux
+        "etapes": resultats,
+    }
+
+
+def measure_download(FILE_PATH, taille, lines, memoire, workdir):
+    """Mesure script_deces.download_file sur le fichier synthétique, servi par un serveur HTTP local."""
+    from script_deces import download_file
+    serveur = serve_directory(workdir)
+    file_name = "telechargement-" + os.path.basename(FILE_PATH)
+    url = f"http://127.0.0.1:{serveur.server_address[1]}/{FILE_PATH}"
+
+    def telecharger(): # téléchargement complet : le fichier et ses métadonnées sont d'abord supprimés
+        for chemin in (file_name, file_name + ".meta.json"):
+            chemin = os.path.join(DOWNLOAD_DIR, chemin)
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        return download_file(url, file_name)
+
+    try:
+        _, mesures = measure(telecharger, lines, memoire)
+    finally:
+        serveur.shutdown()
+        serveur.server_close()
+    mesures["octets_par_seconde"] = round(taille / mesures["secondes"]) if mesures["secondes"] else None
+    return mesures
+
+
+def save_results(resultats, output_dir=BENCHMARK_DIR):
+    """Enregistre les résultats dans output_dir/benchmark-<date>-<lignes>.json et retourne le chemin du fichier."""
+    os.makedirs(output_dir, exist_ok=True)
+    date = resultats["date"].replace(":", "").replace("-", "")
+    file_path = os.path.join(output_dir, f"benchmark-{date}-{resultats['lignes']}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=4)
+    logging.info(f"✅ Résultats enregistrés : {file_path}")
+    return file_path
+
+
+def compare_results(reference, resultats, tolerance=BENCHMARK_TOLERANCE):
+    """
+    Compare le débit de chaque étape (hors ETAPES_NON_COMPAREES) à une mesure de référence.
+
+    :param reference: Résultats de référence (dictionnaire ou chemin d'un fichier JSON de résultats).
+    :param resultats: Résultats à comparer.
+    :param tolerance: Baisse relative de débit tolérée.
+    :return: Liste des régressions (étape, débit de référence, débit mesuré, rapport).
+    """
+    if isinstance(reference, str):
+        with open(reference, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+    regressions = []
+    for etape, mesures in resultats["etapes"].items():
+        if etape in ETAPES_NON_COMPAREES:
+            continue
+        avant = reference["etapes"].get(etape, {}).get("lignes_par_seconde")
+        apres = mesures.get("lignes_par_seconde")
+        if not avant or not apres:
+            continue
+        rapport = apres / avant
+        if rapport < 1 - tolerance:
+            regressions.append((etape, avant, apres, round(rapport, 3)))
+            logging.warning(f"❌ Régression {etape} : {avant} -> {apres} lignes/s ({rapport:.0%})")
+        else:
+            logging.info(f"✅ {etape} : {avant} -> {apres} lignes/s ({rapport:.0%})")
+    if reference.get("lignes") != resultats.get("lignes"):
+        logging.warning(f"Comparaison de mesures sur des volumes différents : {reference.get('lignes')} et {resultats.get('lignes')} lignes")
+    return regressions
+
+
+def log_results(resultats):
+    """Affiche les mesures de chaque étape."""
+    for etape, mesures in resultats["etapes"].items():
+        memoire = f", pic mémoire {mesures['pic_memoire_mo']} Mo" if "pic_memoire_mo" in mesures else ""
+        logging.info(f"{etape} : {mesures['secondes']} s, {mesures['lignes_par_seconde']} lignes/s{memoire}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Mesures de performance du pipeline sur un fichier synthétique")
+    parser.add_argument("--lignes", type=int, default=100000, help="Nombre de lignes du fichier synthétique (1 000 à 30 000 000)")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--etapes", nargs="+", choices=ETAPES, default=ETAPES)
+    parser.add_argument("--sans-memoire", action="store_true", help="Ne pas mesurer le pic de mémoire (une seule exécution par étape)")
+    parser.add_argument("--dossier", help="Dossier de travail (par défaut un dossier temporaire)")
+    parser.add_argument("--reference", help="Fichier JSON de résultats précédents à comparer")
+    args = parser.parse_args()
+    output_dir = os.path.abspath(BENCHMARK_DIR)
+    resultats = run_benchmark(args.lignes, args.graine, args.etapes, not args.sans_memoire, args.dossier)
+    log_results(resultats)
+    save_results(resultats, output_dir)
+    if args.reference and compare_results(args.reference, resultats):
+        sys.exit(1) # régression détectée
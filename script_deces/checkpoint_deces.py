@@ -0,0 +1,169 @@
+import os, re, csv, json, logging, datetime
+from contextlib import ExitStack
+from config import PROCESSED_DIR, PARSER_ENGINE, CHECKPOINT_BYTES, PARQUET_OUTPUT, DB_OUTPUT
+from pipeline_deces import FIELDNAMES, init_counters, iter_data_from_lines, output_paths, tee_outputs, log_counters
+from quarantine_deces import QuarantineWriter, quarantine_path
+from source_deces import is_compressed, iter_line_blocks, iter_offset_blocks
+from metrics_deces import stage
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Fichiers sources publiés par l'INSEE (mensuels, annuels), bruts ou compressés
+pattern_source = re.compile(r"^deces-.*\.(txt|gz|zip)$")
+
+
+def checkpoint_path(source_file_name):
+    """Chemin du point de reprise d'un fichier source."""
+    return PROCESSED_DIR + '/' + f"{source_file_name}.checkpoint.json"
+
+
+def load_checkpoint(source_file_name):
+    """Lit le point de reprise d'un fichier source, ou None s'il n'existe pas (ou est illisible)."""
+    try:
+        with open(checkpoint_path(source_file_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_checkpoint(checkpoint, source_file_name):
+    """Enregistre le point de reprise de façon atomique (fichier temporaire puis remplacement)."""
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    file_path = checkpoint_path(source_file_name)
+    checkpoint["mis_a_jour"] = datetime.datetime.now().isoformat(timespec="seconds")
+    with open(file_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=4)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def is_processed(source_file_name, source_file_path):
+    """Indique si un fichier source a été entièrement traité (et n'a pas changé de taille depuis)."""
+    checkpoint = load_checkpoint(source_file_name)
+    return checkpoint is not None and checkpoint["termine"] and checkpoint["taille"] == os.path.getsize(source_file_path)
+
+
+def find_unprocessed_files(download_dir):
+    """Fichiers sources du dossier pas encore entièrement traités, du plus ancien au plus récent (ordre des noms)."""
+    return [
+        file_name for file_name in sorted(os.listdir(download_dir))
+        if pattern_source.match(file_name) and not is_processed(file_name, download_dir + '/' + file_name)
+    ]
+
+
+def iter_blocks_from(FILE_PATH, offset=0, lignes_lues=0):
+    """
+    Lit le fichier source par blocs de lignes à partir d'un point de reprise.
+
+    Un fichier non compressé est relu directement à partir de l'octet offset ; une archive .gz / .zip
+    ne permet pas d'accès direct, elle est relue depuis le début en sautant les lignes_lues premières lignes.
+
+    :return: Générateur de tuples (position de fin du bloc en octets ou None pour une archive, lignes du bloc).
+    """
+    if not is_compressed(FILE_PATH):
+        yield from iter_offset_blocks(FILE_PATH, offset)
+        return
+    for lignes in iter_line_blocks(FILE_PATH):
+        if lignes_lues >= len(lignes): # bloc déjà traité
+            lignes_lues -= len(lignes)
+            continue
+        yield None, lignes[lignes_lues:]
+        lignes_lues = 0
+
+
+def resume_outputs(checkpoint, paths):
+    """
+    Ramène les fichiers de sortie à leur taille au dernier point de reprise (les données écrites après sont refaites).
+
+    :return: True si la reprise est possible, False si un fichier de sortie manque ou est plus court que prévu.
+    """
+    for path, taille in zip(paths, checkpoint["tailles_sorties"]):
+        if not os.path.exists(path) or os.path.getsize(path) < taille:
+            return False
+    for path, taille in zip(paths, checkpoint["tailles_sorties"]):
+        os.truncate(path, taille)
+    return True
+
+
+def pipeline_checkpointed(FILE, FILE_PATH, engine=PARSER_ENGINE, checkpoint_bytes=CHECKPOINT_BYTES):
+    """
+    Pipeline en flux avec points de reprise : un traitement interrompu reprend là où il s'était arrêté.
+
+    Toutes les checkpoint_bytes octets lus, les fichiers JSON Lines, CSV et de quarantaine ainsi que l'index de
+    dédoublonnage sont vidés sur le disque et un point de reprise est enregistré dans
+    PROCESSED_DIR/<fichier>.checkpoint.json : position dans le fichier source, lignes lues, décès émis, tailles
+    des fichiers de sortie et compteurs. Au lancement suivant, les sorties sont ramenées à ces tailles et la lecture
+    reprend à cette position. Un fichier terminé n'est pas retraité, sauf si sa taille a changé. Les sorties Parquet
+    et SQLite étant réécrites entièrement, elles imposent de reprendre le fichier depuis le début.
+
+    :return: Les compteurs du fichier (voir init_counters).
+    """
+    taille = os.path.getsize(FILE_PATH)
+    jsonl_file_path, csv_file_path = output_paths(FILE, FILE_PATH)
+    paths = (jsonl_file_path, csv_file_path, quarantine_path(FILE))
+    checkpoint = load_checkpoint(FILE)
+    if checkpoint is not None and checkpoint["taille"] != taille:
+        logging.info(f"🔄 Fichier source modifié, traitement depuis le début : {FILE}")
+        checkpoint = None
+    if checkpoint is not None and checkpoint["termine"]:
+        logging.info(f"🔄 Déjà traité : {FILE}")
+        return checkpoint["compteurs"]
+    if checkpoint is not None and (PARQUET_OUTPUT or DB_OUTPUT or not resume_outputs(checkpoint, paths)):
+        logging.info(f"🔄 Reprise impossible, traitement depuis le début : {FILE}")
+        checkpoint = None
+
+    reprise = checkpoint is not None
+    if reprise:
+        counters = checkpoint["compteurs"]
+        logging.info(f"🔄 Reprise de {FILE} à la ligne {counters['lignes']} ({checkpoint['enregistrements']} décès déjà émis)")
+    else:
+        counters = init_counters()
+        checkpoint = {"fichier": FILE, "taille": taille, "offset": 0, "lignes": 0, "enregistrements": 0,
+                      "tailles_sorties": [0, 0, 0], "termine": False, "compteurs": counters}
+
+    with ExitStack() as stack:
+        etape = stack.enter_context(stage("flux", FILE))
+        etape.infos["reprise_offset"] = checkpoint["offset"]
+        quarantine = stack.enter_context(QuarantineWriter(paths[2], counters, append=reprise)) # lignes rejetées et raisons du rejet
+        f_json = stack.enter_context(open(jsonl_file_path, "a" if reprise else "w", encoding="utf-8"))
+        f_csv = stack.enter_context(open(csv_file_path, "a" if reprise else "w", encoding="utf-8", newline=""))
+        writer = csv.DictWriter(f_csv, fieldnames=FIELDNAMES)
+        if not reprise:
+            writer.writeheader()
+
+        dedup_index = None # renseigné par tee_outputs si DEDUP_ENABLED
+
+        def save(offset):
+            """Vide les sorties (et l'index de dédoublonnage) sur le disque puis enregistre le point de reprise correspondant."""
+            if dedup_index is not None: # empreintes des décès déjà écrits, sinon réémis comme nouveaux par les fichiers suivants
+                dedup_index.flush()
+            quarantine.flush()
+            f_json.flush()
+            f_csv.flush()
+            checkpoint.update(offset=offset, lignes=counters["lignes"], compteurs=counters,
+                              tailles_sorties=[os.path.getsize(path) for path in paths])
+            save_checkpoint(checkpoint, FILE)
+
+        def iter_data():
+            lus = 0 # caractères lus depuis le dernier point de reprise
+            for fin, lignes in iter_blocks_from(FILE_PATH, checkpoint["offset"] or 0, counters["lignes"]):
+                yield from iter_data_from_lines(lignes, engine, counters, quarantine)
+                # les décès du bloc ont tous été écrits quand le consommateur redemande une donnée
+                lus += sum(map(len, lignes))
+                if lus >= checkpoint_bytes:
+                    save(fin)
+                    lus = 0
+
+        data_iter, dedup_index = tee_outputs(iter_data(), FILE, FILE_PATH, counters, stack) # dédoublonnage, Parquet et base SQLite
+        for data in data_iter:
+            f_json.write(json.dumps(data, ensure_ascii=False) + "\n") # une donnée JSON par ligne
+            writer.writerow(data)
+            checkpoint["enregistrements"] += 1
+        checkpoint["termine"] = True
+        save(taille if not is_compressed(FILE_PATH) else None)
+        etape.octets_lus, etape.octets_ecrits = taille, sum(checkpoint["tailles_sorties"])
+        etape.enregistrements = checkpoint["enregistrements"]
+        etape.infos["compteurs"] = counters
+    logging.info(f"✅ Téléchargé : {jsonl_file_path}")
+    logging.info(f"✅ Converti en CSV : {csv_file_path}")
+    log_counters(counters, FILE_PATH)
+    return counters
@@ -11,4 +11,59 @@ PROCESSED_DIR='processed_files'
 
 # Dossier de téléchargement
 HISTORY_FILE="downloaded_files.txt" # Fichier d'historique des fichiers téléchargés
-CHUNK_SIZE=1024 # Taille des chunks pour le téléchargement
\ No newline at end of file
+MANIFEST_FILE="manifest.json" # Manifeste des fichiers publiés (URL, période, taille, ETag, statut), indexé par période
+CHUNK_SIZE=1024 * 1024 # Taille des chunks pour le téléchargement
+DOWNLOAD_WORKERS=4 # Nombre maximum de téléchargements simultanés
+DOWNLOAD_TIMEOUT=60 # Délai maximum (en secondes) de connexion et de lecture des téléchargements
+PARSER_WORKERS=None # Nombre de processus du pipeline parallèle (None = nombre de coeurs)
+PARSER_CHUNK_BYTES=32 * 1024 * 1024 # Taille (en octets) des morceaux du fichier source analysés par chaque processus
+
+# Moteur d'analyse des lignes du fichier source : "regex" (historique) ou "colonnes" (découpage du format fixe INSEE,
+# environ 2 fois plus rapide, pas davantage : la construction des dictionnaires domine, voir README)
+PARSER_ENGINE='regex'
+PARSER_BLOCK_SIZE=1024 * 1024 # Taille (en octets) des blocs de lignes lus à la fois par le parser
+
+# Mode du pipeline : "liste" (données gardées en mémoire, JSON indenté + CSV pandas), "flux" (une passe, mémoire constante,
+# JSON Lines + CSV) ou "parallele" (flux découpé en morceaux analysés par PARSER_WORKERS processus)
+PIPELINE_MODE='liste'
+
+# Sortie Parquet (modes "liste" et "flux") : colonnes typées, partitionnées par année et mois de décès
+PARQUET_OUTPUT=False # Écrire aussi les données en Parquet (nécessite pyarrow)
+PARQUET_DIR='parquet_files' # Dossier racine des partitions annee_deces=AAAA/mois_deces=MM
+PARQUET_BATCH_SIZE=50000 # Nombre maximum de lignes en attente, toutes partitions confondues, avant écriture des lots
+
+# Quarantaine des lignes rejetées : fichier <source>.rejets.tsv (numéro de ligne, raison, ligne) écrit pendant la lecture
+QUARANTINE_BUFFER_SIZE=1000 # Nombre de lignes rejetées gardées en mémoire avant écriture
+QUARANTINE_LOG_SAMPLE=10 # Nombre maximum de lignes rejetées affichées dans les logs
+
+# Base SQLite (modes "liste" et "flux") : chargement incrémental par fichier source, par lots d'une transaction
+DB_OUTPUT=False # Charger aussi les données dans la base SQLite
+DB_FILE='deces.db' # Fichier de la base SQLite
+DB_BATCH_SIZE=50000 # Nombre de lignes insérées par transaction
+
+# Dédoublonnage entre fichiers (modes "liste" et "flux") : mensuels, annuels et corrections republient les mêmes décès
+DEDUP_ENABLED=False # N'émettre que les décès absents des fichiers sources précédents
+DEDUP_FILE='dedup.db' # Index persistant des empreintes des décès déjà émis
+DEDUP_BLOOM_BITS=512 * 1024 * 1024 # Taille (en bits, 64 Mo) du filtre de Bloom placé devant l'index : ~1 % de faux positifs à 50 millions de décès
+DEDUP_BLOOM_HASHES=7 # Nombre de fonctions de hachage du filtre de Bloom
+DEDUP_BATCH_SIZE=50000 # Nombre d'empreintes enregistrées par transaction
+
+# Recherche de personnes dans les décès (picker_deces.py)
+PICKER_MIN_SCORE=0.6 # Score minimum (entre 0 et 1) d'un candidat en mode tolérant
+PICKER_MAX_CANDIDATES=5 # Nombre maximum de candidats retenus par personne recherchée
+
+# Générateur de fichiers synthétiques (generator_deces.py) : proportions des catégories de lignes
+GENERATOR_MIX={"france": 0.85, "outre_mer": 0.03, "etranger": 0.08, "congo": 0.01, "malformee": 0.03}
+
+# Mesures de performance (benchmark_deces.py)
+BENCHMARK_DIR='benchmarks' # Dossier des résultats JSON, comparables d'une exécution à l'autre
+BENCHMARK_TOLERANCE=0.10 # Baisse de débit (10 %) au-delà de laquelle une étape est signalée en régression
+
+# Rapport d'exécution (metrics_deces.py) : durée, temps CPU, octets lus et écrits, débit et pic de RSS par étape et par fichier
+REPORT_OUTPUT=True # Enregistrer le rapport JSON de chaque lancement
+REPORT_DIR='reports' # Dossier des rapports JSON et des profils cProfile
+PROFILE_STAGES=[] # Étapes à profiler avec cProfile, par exemple ["extraction", "csv"]
+
+# Traitement par lots (python main.py --lot) : tous les fichiers téléchargés non encore traités, avec points de reprise
+BATCH_WORKERS=4 # Nombre maximum de fichiers traités simultanément (un processus par fichier)
+CHECKPOINT_BYTES=16 * 1024 * 1024 # Volume (en octets) du fichier source lu entre deux points de reprise
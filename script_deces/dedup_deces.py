@@ -0,0 +1,178 @@
+import os, sqlite3, hashlib, logging
+from config import DEDUP_FILE, DEDUP_BLOOM_BITS, DEDUP_BLOOM_HASHES, DEDUP_BATCH_SIZE
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Champs identifiant un décès, communs aux fichiers mensuels, annuels et de corrections
+KEY_FIELDS = ("nom", "prénoms", "date_naissance", "CP_naissance", "date_deces", "CP_deces", "acte_deces")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, nom TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS cles (hash INTEGER PRIMARY KEY, source_id INTEGER, execution INTEGER) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur INTEGER);
+"""
+
+
+def record_hash(data):
+    """Empreinte compacte (entier signé de 64 bits) des champs identifiant un décès."""
+    texte = "\x1f".join(data[field] or "" for field in KEY_FIELDS) # séparateur absent des données
+    return int.from_bytes(hashlib.blake2b(texte.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom sur les empreintes de 64 bits : "absent" est certain, "présent" est seulement probable.
+
+    Les k positions sont dérivées de l'empreinte par double hachage.
+    """
+
+    def __init__(self, bits=DEDUP_BLOOM_BITS, hashes=DEDUP_BLOOM_HASHES, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    def _positions(self, empreinte):
+        empreinte &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = empreinte & 0xFFFFFFFF, (empreinte >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, empreinte):
+        for position in self._positions(empreinte):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, empreinte):
+        array = self.array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(empreinte))
+
+
+class DedupIndex:
+    """
+    Index persistant des décès déjà émis par le pipeline, tous fichiers sources confondus.
+
+    Les empreintes sont stockées dans une base SQLite (DEDUP_FILE) ; un filtre de Bloom enregistré à côté
+    (DEDUP_FILE + ".bloom") évite d'interroger la base pour les décès jamais vus, qui sont la majorité
+    dans un fichier mensuel. Le filtre est reconstruit depuis la base s'il n'est plus synchronisé avec elle.
+
+    Chaque empreinte garde le fichier source qui l'a émise en premier et l'exécution qui l'a émise en dernier :
+    relancer le pipeline sur ce même fichier (après une interruption par exemple) réémet ses décès au lieu
+    de les écarter, mais un doublon à l'intérieur du fichier reste écarté pendant une même exécution.
+    Sans execution, une nouvelle exécution est numérotée à l'ouverture de l'index.
+    Un filtre enregistré avec une autre taille que bloom_bits est reconstruit à cette taille.
+    """
+
+    def __init__(self, db_file=DEDUP_FILE, batch_size=DEDUP_BATCH_SIZE, execution=None, bloom_bits=DEDUP_BLOOM_BITS):
+        self.db_file = db_file
+        self.bloom_file = db_file + ".bloom"
+        self.batch_size = batch_size
+        self.bloom_bits = bloom_bits
+        self.connection = sqlite3.connect(db_file)
+        self.connection.executescript(SCHEMA)
+        row = self.connection.execute("SELECT valeur FROM meta WHERE cle = 'nb_cles'").fetchone()
+        self.count = row[0] if row else 0
+        self.execution = execution if execution is not None else self._new_execution()
+        self.pending = {}  # empreintes nouvelles pas encore enregistrées dans la base -> identifiant du fichier source
+        self.reemises = set()  # empreintes d'une exécution précédente réémises, exécution pas encore mise à jour dans la base
+        self.bloom = self._load_bloom()
+
+    def _load_bloom(self):
+        """Lit le filtre de Bloom enregistré, ou le reconstruit depuis la base s'il est absent ou désynchronisé."""
+        try:
+            with open(self.bloom_file, "rb") as f:
+                count = int.from_bytes(f.read(8), "big") # nombre d'empreintes contenues dans le filtre
+                bloom = BloomFilter(bits=self.bloom_bits, data=f.read())
+            if count == self.count and len(bloom.array) == (self.bloom_bits + 7) // 8:
+                return bloom
+        except FileNotFoundError:
+            pass
+        logging.info(f"🔄 Reconstruction du filtre de Bloom depuis {self.db_file}")
+        bloom = BloomFilter(bits=self.bloom_bits)
+        for (empreinte,) in self.connection.execute("SELECT hash FROM cles"):
+            bloom.add(empreinte)
+        return bloom
+
+    def _new_execution(self):
+        """Numéro d'une nouvelle exécution, enregistré aussitôt dans la base."""
+        row = self.connection.execute("SELECT valeur FROM meta WHERE cle = 'nb_executions'").fetchone()
+        execution = (row[0] if row else 0) + 1
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES ('nb_executions', ?)", (execution,))
+        return execution
+
+    def source_id(self, source):
+        """Identifiant d'un fichier source dans l'index, créé si besoin."""
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO sources (nom) VALUES (?)", (source,))
+        return self.connection.execute("SELECT id FROM sources WHERE nom = ?", (source,)).fetchone()[0]
+
+    def is_new(self, data, source_id=None):
+        """
+        Indique si le décès n'a jamais été vu (ou seulement dans le fichier source source_id,
+        lors d'une exécution précédente), et l'enregistre le cas échéant.
+        """
+        empreinte = record_hash(data)
+        if empreinte in self.bloom: # peut-être déjà vu : vérification exacte
+            if empreinte in self.pending or empreinte in self.reemises:
+                return False
+            row = self.connection.execute("SELECT source_id, execution FROM cles WHERE hash = ?", (empreinte,)).fetchone()
+            if row is not None:
+                if source_id is None or row[0] != source_id or row[1] == self.execution: # vu dans un autre fichier source ou plus tôt dans cette exécution
+                    return False
+                # relance du même fichier source : le décès est réémis (une seule fois par exécution)
+                self.reemises.add(empreinte)
+                if len(self.reemises) >= self.batch_size:
+                    self.flush()
+                return True
+            self.bloom.add(empreinte)
+        else: # absent du filtre : jamais vu, sans interroger la base
+            self.bloom.add(empreinte)
+        self.pending[empreinte] = source_id
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Enregistre les nouvelles empreintes et l'exécution des empreintes réémises dans la base, en une transaction."""
+        if not self.pending and not self.reemises:
+            return
+        with self.connection:
+            avant = self.connection.total_changes
+            self.connection.executemany("INSERT OR IGNORE INTO cles (hash, source_id, execution) VALUES (?, ?, ?)",
+                                        ((empreinte, source_id, self.execution) for empreinte, source_id in self.pending.items()))
+            self.count += self.connection.total_changes - avant # empreintes réellement ajoutées
+            self.connection.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES ('nb_cles', ?)", (self.count,))
+            self.connection.executemany("UPDATE cles SET execution = ? WHERE hash = ?",
+                                        ((self.execution, empreinte) for empreinte in self.reemises))
+        self.pending = {}
+        self.reemises = set()
+
+    def close(self):
+        """Enregistre les empreintes restantes et le filtre de Bloom (de façon atomique), puis ferme la base."""
+        self.flush()
+        tmp_file = self.bloom_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(self.count.to_bytes(8, "big"))
+            f.write(self.bloom.array)
+        os.replace(tmp_file, self.bloom_file)
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def filter_new(data_iter, index, source=None, counters=None):
+    """
+    Ne renvoie que les décès jamais vus dans les autres fichiers sources (ni plus tôt dans le même fichier).
+
+    Les doublons écartés sont comptés dans counters["doublons"].
+    """
+    counters = counters if counters is not None else {}
+    counters.setdefault("doublons", 0)
+    source_id = index.source_id(source) if source is not None else None
+    for data in data_iter:
+        if index.is_new(data, source_id):
+            yield data
+        else:
+            counters["doublons"] += 1
@@ -0,0 +1,189 @@
+import os, json, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import DOWNLOAD_DIR, CHUNK_SIZE, DOWNLOAD_WORKERS, DOWNLOAD_TIMEOUT
+from metrics_deces import stage
+
+logging.basicConfig(level=logging.INFO) # Configurer le logging pour afficher les messages INFO
+
+# Statuts renvoyés par download
+TELECHARGE = "telecharge"     # fichier (re)téléchargé
+NON_MODIFIE = "non_modifie"   # fichier déjà à jour (304 Not Modified)
+ERREUR = "erreur"             # échec du téléchargement
+
+_session_locale = threading.local() # une session par thread, chacune avec son pool de connexions
+
+
+def get_session(pool_size=DOWNLOAD_WORKERS):
+    """Retourne la session HTTP du thread courant, avec un pool de connexions réutilisées."""
+    session = getattr(_session_locale, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session_locale.session = session
+    return session
+
+
+def read_metadata(file_path):
+    """Lit les en-têtes de validation (ETag, Last-Modified) enregistrés pour un fichier téléchargé."""
+    try:
+        with open(file_path + ".meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_metadata(file_path, response):
+    """Enregistre les en-têtes de validation de la réponse à côté du fichier téléchargé."""
+    metadata = {
+        "url": response.url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    with open(file_path + ".meta.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=4)
+
+
+def content_range(response):
+    """Lit l'en-tête Content-Range ("bytes début-fin/total" ou "bytes */total") : tuple (début ou None, total ou None)."""
+    valeur = response.headers.get("Content-Range", "")
+    unite, _, plage = valeur.partition(" ")
+    if unite != "bytes" or "/" not in plage:
+        return None, None
+    debut, _, total = plage.partition("/")
+    debut = debut.split("-")[0]
+    return (int(debut) if debut.isdigit() else None), (int(total) if total.isdigit() else None)
+
+
+def remove_part(part_path):
+    """Supprime un fichier temporaire .part et ses en-têtes de validation."""
+    for path in (part_path, part_path + ".meta.json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def finalize(part_path, file_path):
+    """Remplace de façon atomique le fichier final (et ses en-têtes de validation) par le .part complet."""
+    os.replace(part_path, file_path)
+    if os.path.exists(part_path + ".meta.json"):
+        os.replace(part_path + ".meta.json", file_path + ".meta.json")
+
+
+def download(url, file_name, download_dir=DOWNLOAD_DIR, session=None, chunk_size=CHUNK_SIZE, timeout=DOWNLOAD_TIMEOUT):
+    """
+    Télécharge un fichier de façon reprenable et atomique.
+
+    * si le fichier existe déjà, la requête est conditionnelle (If-None-Match / If-Modified-Since)
+      et un 304 évite de le retélécharger ;
+    * le contenu est écrit dans un fichier temporaire <nom>.part, repris avec une requête Range
+      si un transfert précédent a été interrompu ; un .part déjà complet (416) est finalisé, un .part
+      inutilisable (416 sur une autre taille, 206 ne commençant pas à sa fin) est supprimé et le fichier
+      retéléchargé en entier ;
+    * le fichier final n'est remplacé qu'une fois le transfert complet et sa taille vérifiée.
+
+    :param url: URL du fichier.
+    :param file_name: Nom du fichier local.
+    :param download_dir: Dossier de téléchargement.
+    :param session: Session HTTP (par défaut la session du thread courant).
+    :param chunk_size: Taille (en octets) des blocs lus et écrits.
+    :param timeout: Délai maximum (en secondes) de connexion et de lecture.
+    :return: Statut du téléchargement (TELECHARGE, NON_MODIFIE ou ERREUR).
+    """
+    with stage("telechargement", file_name) as etape: # durée, octets reçus et statut dans le rapport d'exécution
+        part_path = os.path.join(download_dir, file_name) + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        status = _download(url, file_name, download_dir, session, chunk_size, timeout)
+        if status == TELECHARGE:
+            etape.octets_lus = etape.octets_ecrits = max(os.path.getsize(os.path.join(download_dir, file_name)) - offset, 0)
+        elif os.path.exists(part_path): # transfert incomplet : octets reçus dans le .part
+            etape.octets_lus = etape.octets_ecrits = max(os.path.getsize(part_path) - offset, 0)
+        etape.infos.update(url=url, statut=status)
+    return status
+
+
+def _download(url, file_name, download_dir, session, chunk_size, timeout):
+    session = session or get_session()
+    file_path = os.path.join(download_dir, file_name)
+    part_path = file_path + ".part"
+    metadata = read_metadata(file_path)
+
+    headers = {}
+    if os.path.exists(file_path): # fichier déjà présent : requête conditionnelle
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset: # transfert interrompu : reprise à partir de l'octet déjà reçu
+        headers["Range"] = f"bytes={offset}-"
+        partial = read_metadata(part_path)
+        if partial.get("etag") or partial.get("last_modified"):
+            headers["If-Range"] = partial.get("etag") or partial["last_modified"] # reprise seulement si la ressource n'a pas changé
+
+    try:
+        with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304: # fichier inchangé depuis le dernier téléchargement
+                logging.info(f"🔄 Non modifié : {file_name}")
+                return NON_MODIFIE
+            if response.status_code == 416 and offset: # plage refusée : le .part est déjà complet ou ne correspond plus
+                _, total = content_range(response)
+                if total == offset: # interruption entre le dernier bloc et le remplacement du fichier final
+                    finalize(part_path, file_path)
+                    logging.info(f"✅ Téléchargé : {file_name}")
+                    return TELECHARGE
+                logging.info(f"🔄 Reprise impossible (416), nouveau téléchargement complet : {file_name}")
+                response.close()
+                remove_part(part_path)
+                return _download(url, file_name, download_dir, session, chunk_size, timeout)
+            if response.status_code == 206: # reprise acceptée
+                debut, _ = content_range(response)
+                if debut != offset: # la plage reçue ne prolonge pas le .part
+                    logging.info(f"🔄 Plage reçue inattendue ({response.headers.get('Content-Range')}), nouveau téléchargement complet : {file_name}")
+                    response.close()
+                    remove_part(part_path)
+                    return _download(url, file_name, download_dir, session, chunk_size, timeout)
+                mode = "ab"
+            elif response.status_code == 200: # contenu complet (reprise refusée ou nouveau fichier)
+                mode, offset = "wb", 0
+            else:
+                logging.info(f"❌ Erreur {response.status_code} pour {url}")
+                return ERREUR
+            write_metadata(part_path, response) # validation de la ressource pour une reprise éventuelle
+            expected = response.headers.get("Content-Length")
+            if expected is None or response.headers.get("Content-Encoding", "identity") != "identity":
+                expected = None # taille inconnue ou contenu compressé à la volée : pas de vérification
+            else:
+                expected = offset + int(expected)
+
+            with open(part_path, mode) as file:
+                for chunk in response.iter_content(chunk_size): # itérer sur des blocs de chunk_size octets
+                    file.write(chunk)
+            written = os.path.getsize(part_path)
+            if expected is not None and written != expected: # transfert incomplet : le .part est gardé pour reprise
+                logging.info(f"❌ Transfert incomplet pour {file_name} : {written}/{expected} octets")
+                return ERREUR
+            finalize(part_path, file_path) # remplacement atomique du fichier final
+            logging.info(f"✅ Téléchargé : {file_name}")
+            return TELECHARGE
+    except requests.exceptions.RequestException as e: # le .part est gardé pour reprise
+        logging.error(f"Erreur réseau pour {url} : {e}")
+        return ERREUR
+
+
+def download_many(files, download_dir=DOWNLOAD_DIR, workers=DOWNLOAD_WORKERS, chunk_size=CHUNK_SIZE):
+    """
+    Télécharge plusieurs fichiers en parallèle avec un nombre borné de threads.
+
+    :param files: Liste de tuples (url, nom du fichier).
+    :param download_dir: Dossier de téléchargement.
+    :param workers: Nombre maximum de téléchargements simultanés.
+    :param chunk_size: Taille (en octets) des blocs lus et écrits.
+    :return: Dictionnaire {url: statut}, dans l'ordre de files.
+    """
+    os.makedirs(download_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(url, pool.submit(download, url, file_name, download_dir, None, chunk_size)) for url, file_name in files]
+        return {url: future.result() for url, future in futures}
@@ -0,0 +1,122 @@
+import random
+from config import GENERATOR_MIX
+
+# Communes françaises (code INSEE, commune)
+COMMUNES = [
+    ("01053", "BOURG-EN-BRESSE"), ("75056", "PARIS"), ("13055", "MARSEILLE"), ("69123", "LYON"),
+    ("31555", "TOULOUSE"), ("06088", "NICE"), ("44109", "NANTES"), ("67482", "STRASBOURG"),
+    ("33063", "BORDEAUX"), ("59350", "LILLE"), ("35238", "RENNES"), ("2A004", "AJACCIO"),
+    ("2B033", "BASTIA"), ("29019", "BREST"), ("63113", "CLERMONT-FERRAND"), ("22278", "SAINT-BRIEUC"),
+    ("74010", "ANNECY"), ("80021", "AMIENS"), ("76540", "ROUEN"), ("57463", "METZ"),
+    ("42218", "SAINT-ETIENNE"), ("38185", "GRENOBLE"), ("21231", "DIJON"), ("49007", "ANGERS"),
+    ("30189", "NIMES"), ("37261", "TOURS"), ("87085", "LIMOGES"), ("64445", "PAU"),
+]
+
+# Départements et collectivités d'outre-mer (code INSEE, commune, pays)
+OUTRE_MER = [
+    ("97411", "SAINT-DENIS", ""), ("97415", "SAINT-PAUL", "LA REUNION"), ("97105", "BASSE-TERRE", ""),
+    ("97209", "FORT-DE-FRANCE", ""), ("97302", "CAYENNE", ""), ("97611", "MAMOUDZOU", ""),
+]
+
+# Naissances à l'étranger (code INSEE, commune, pays)
+ETRANGER = [
+    ("99350", "CASABLANCA", "MAROC"), ("99350", "", "MAROC"), ("99352", "ALGER", "ALGERIE"),
+    ("99351", "TUNIS", "TUNISIE"), ("99109", "BERLIN", "ALLEMAGNE"), ("99134", "MADRID", "ESPAGNE"),
+    ("99127", "ROME", "ITALIE"), ("99139", "LISBONNE", "PORTUGAL"), ("99404", "NEW YORK", "ETATS UNIS"),
+    ("99326", "ABIDJAN", "COTE D'IVOIRE"), ("99341", "DAKAR", "SENEGAL"), ("99132", "LONDRES", "ROYAUME-UNI"),
+]
+
+# Cas particulier du code 99312 (République démocratique du Congo)
+CONGO = [("99312", "KINSHASA", "CONGO (REPUBLIQUE DEMOCRATIQUE)"), ("99312", "LUBUMBASHI", "CONGO")]
+
+NOMS = ["MARTIN", "BERNARD", "DUBOIS", "THOMAS", "ROBERT", "RICHARD", "PETIT", "DURAND", "LEROY", "MOREAU",
+        "SIMON", "LAURENT", "LEFEBVRE", "MICHEL", "GARCIA", "DAVID", "BERTRAND", "ROUX", "VINCENT", "FOURNIER",
+        "LE GOFF", "D'ARTAGNAN", "MARTIN-DURAND", "N'DIAYE", "DE LA FONTAINE", "BEN AHMED", "NGUYEN", "DA SILVA"]
+
+PRENOMS = ["JEAN", "MARIE", "PIERRE", "MICHEL", "ANDRE", "PHILIPPE", "MONIQUE", "FRANCOISE", "CLAUDE", "JACQUES",
+           "NICOLE", "BERNARD", "CATHERINE", "ALAIN", "CHRISTIANE", "LOUIS", "JEANNE", "PAUL", "ANNE", "HENRI"]
+
+
+def fixed_record(nom, prenoms, sexe, date_naissance, code_naissance, commune, pays, date_deces, code_deces, acte):
+    """Ligne au format fixe INSEE, terminée par une fin de ligne."""
+    return (f"{nom + '*' + prenoms + '/':<80}{sexe}{date_naissance}{code_naissance}"
+            f"{commune[:30]:<30}{pays[:30]:<30}{date_deces}{code_deces}{acte:<9}\n")
+
+
+def random_date(rng, debut, fin, incomplete=0.0):
+    """Date AAAAMMJJ entre les années debut et fin, avec jour ou mois à 00 (date incomplète) selon la probabilité donnée."""
+    annee, mois, jour = rng.randint(debut, fin), rng.randint(1, 12), rng.randint(1, 28)
+    if rng.random() < incomplete:
+        jour = 0
+        if rng.random() < 0.5:
+            mois = 0
+    return f"{annee:04d}{mois:02d}{jour:02d}"
+
+
+def malformed(rng, ligne):
+    """Abîme une ligne valide de l'une des façons rencontrées dans les fichiers INSEE."""
+    defaut = rng.randrange(6)
+    if defaut == 0:
+        return ligne[:rng.randint(20, 150)] + "\n"           # ligne tronquée
+    if defaut == 1:
+        return ligne.replace("*", " ", 1)                     # délimiteur nom/prénoms absent
+    if defaut == 2:
+        return ligne[:81] + "19AB0101" + ligne[89:]           # date de naissance invalide
+    if defaut == 3:
+        return "É" + ligne[1:]                                # caractère accentué dans le nom
+    if defaut == 4:
+        return ligne[:154] + "20241399" + ligne[162:]         # date de décès invalide
+    return "\n"                                                # ligne vide
+
+
+def generate_line(rng, mix=GENERATOR_MIX, annee_deces=2024):
+    """Génère une ligne de décès selon les proportions de mix (france, outre_mer, etranger, congo, malformee)."""
+    tirage = rng.random()
+    cumul = 0.0
+    categorie = "france"
+    for nom_categorie, proportion in mix.items():
+        cumul += proportion
+        if tirage < cumul:
+            categorie = nom_categorie
+            break
+
+    if categorie in ("france", "malformee"):
+        code, commune = rng.choice(COMMUNES)
+        pays = ""
+    else:
+        code, commune, pays = rng.choice({"outre_mer": OUTRE_MER, "etranger": ETRANGER, "congo": CONGO}[categorie])
+    prenoms = " ".join(rng.sample(PRENOMS, rng.choice((1, 1, 2, 3))))
+    ligne = fixed_record(
+        rng.choice(NOMS), prenoms, rng.choice("12"), random_date(rng, 1910, 2020, incomplete=0.02),
+        code, commune, pays, random_date(rng, annee_deces, annee_deces), rng.choice(COMMUNES)[0], str(rng.randint(1, 99999)),
+    )
+    return malformed(rng, ligne) if categorie == "malformee" else ligne
+
+
+def generate_file(FILE_PATH, lines, seed=0, mix=GENERATOR_MIX, annee_deces=2024, buffer_lines=10000):
+    """
+    Écrit un fichier synthétique de décès au format fixe INSEE.
+
+    :param FILE_PATH: Chemin du fichier à écrire.
+    :param lines: Nombre de lignes (de 1 000 à plusieurs dizaines de millions).
+    :param seed: Graine du générateur aléatoire (même graine, même fichier).
+    :param mix: Proportions des catégories de lignes.
+    :param annee_deces: Année des dates de décès.
+    :param buffer_lines: Nombre de lignes écrites à la fois.
+    :return: Chemin du fichier écrit.
+    """
+    rng = random.Random(seed)
+    with open(FILE_PATH, "w", encoding="utf-8") as f:
+        for debut in range(0, lines, buffer_lines):
+            f.writelines(generate_line(rng, mix, annee_deces) for _ in range(min(buffer_lines, lines - debut)))
+    return FILE_PATH
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Génère un fichier synthétique de décès au format INSEE")
+    parser.add_argument("fichier", help="Fichier à écrire")
+    parser.add_argument("--lignes", type=int, default=100000)
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    generate_file(args.fichier, args.lignes, args.graine)
@@ -1,18 +1,80 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from script_deces import extract_last_file
 from pipeline_deces import pipeline
-from config import DOWNLOAD_DIR
+from checkpoint_deces import find_unprocessed_files, pipeline_checkpointed
+from config import DOWNLOAD_DIR, BATCH_WORKERS, DEDUP_ENABLED, DB_OUTPUT
+from metrics_deces import RunReport
 
 
-# A revoir pour pouvoir lancer un pipeline pour chaque fichier téléchargé
 def main():
-    full_url_matching, file_url_name = extract_last_file()  # extraire le dernier fichier txt de la page web en récupérant le lien et le nom du fichier
-    FILE = file_url_name  # extraire le nom du fichier
-    FILE_PATH = DOWNLOAD_DIR + '/' + FILE  # Chemin du fichier à traiter
-    pipeline(FILE, FILE_PATH) # traiter le(s) fichier(s) txt (par défaut c'est le fichier m12.txt)
+    with RunReport("main"): # rapport d'exécution : mesures du scraper et de chaque étape du pipeline
+        found = extract_last_file()  # extraire le dernier fichier txt de la page web en récupérant le lien et le nom du fichier
+        if found is None: # fichier du mois précédent pas encore publié ou déjà téléchargé
+            return
+        full_url_matching, file_url_name = found
+        FILE = file_url_name  # extraire le nom du fichier
+        FILE_PATH = DOWNLOAD_DIR + '/' + FILE  # Chemin du fichier à traiter
+        pipeline(FILE, FILE_PATH) # traiter le(s) fichier(s) txt (par défaut c'est le fichier m12.txt)
+
+
+def process_file(FILE, FILE_PATH):
+    """Traite un fichier du lot avec points de reprise, avec son propre rapport d'exécution (un processus par fichier)."""
+    with RunReport(f"lot-{FILE.split('.')[0]}"):
+        return pipeline_checkpointed(FILE, FILE_PATH)
+
+
+def run_batch(download_dir=DOWNLOAD_DIR, workers=BATCH_WORKERS):
+    """
+    Traite tous les fichiers téléchargés qui ne l'ont pas encore été, en parallèle sur au plus workers processus.
+
+    Chaque fichier enregistre ses points de reprise : relancer le lot après une interruption reprend
+    les fichiers inachevés là où ils s'étaient arrêtés et ignore les fichiers terminés. Avec le dédoublonnage
+    ou la base SQLite, les fichiers sont traités un par un, du plus ancien au plus récent (index et base partagés).
+
+    :return: Dictionnaire {nom du fichier: compteurs, ou None en cas d'échec}.
+    """
+    fichiers = find_unprocessed_files(download_dir)
+    if not fichiers:
+        logging.info("Aucun fichier à traiter.")
+        return {}
+    if DEDUP_ENABLED or DB_OUTPUT: # index de dédoublonnage et base SQLite partagés entre les fichiers
+        workers = 1
+    logging.info(f"{len(fichiers)} fichier(s) à traiter avec {workers} processus : {', '.join(fichiers)}")
+
+    resultats = {}
+    if workers == 1: # traitement dans l'ordre, sans pool de processus
+        for FILE in fichiers:
+            try:
+                resultats[FILE] = process_file(FILE, download_dir + '/' + FILE)
+            except Exception as e: # le point de reprise permet de reprendre ce fichier au prochain lancement
+                logging.error(f"❌ Échec du traitement de {FILE} : {e}")
+                resultats[FILE] = None
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_file, FILE, download_dir + '/' + FILE): FILE for FILE in fichiers}
+            for future in as_completed(futures):
+                FILE = futures[future]
+                try:
+                    resultats[FILE] = future.result()
+                except Exception as e: # le point de reprise permet de reprendre ce fichier au prochain lancement
+                    logging.error(f"❌ Échec du traitement de {FILE} : {e}")
+                    resultats[FILE] = None
+    logging.info(f"✅ Lot terminé : {sum(r is not None for r in resultats.values())}/{len(fichiers)} fichier(s) traité(s)")
+    return {FILE: resultats[FILE] for FILE in fichiers}
+
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Téléchargement et traitement des fichiers de décès INSEE")
+    parser.add_argument("--lot", action="store_true", help="Traiter tous les fichiers téléchargés pas encore traités")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Nombre maximum de fichiers traités simultanément")
+    args = parser.parse_args()
+    if args.lot:
+        run_batch(workers=args.workers)
+    else:
+        main()
 
 # Remarques
 #Il reste à variabiliser les paramètres des fichiers téléchargés :
-#Le dernier fichier téléchargé doit se renseigner dans le .env pour être traité
\ No newline at end of file
+#Le dernier fichier téléchargé doit se renseigner dans le .env pour être traité
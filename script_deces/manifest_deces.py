@@ -0,0 +1,142 @@
+import os, re, json, logging
+import requests
+from bs4 import BeautifulSoup
+from config import URL, PATTERN, MANIFEST_FILE, DOWNLOAD_DIR, DOWNLOAD_TIMEOUT
+from download_deces import get_session, read_metadata
+from metrics_deces import stage
+
+logging.basicConfig(level=logging.INFO) # Configurer le logging pour afficher les messages INFO
+
+# Statuts des ressources du manifeste
+A_TELECHARGER = "a_telecharger"
+TELECHARGE = "telecharge"
+
+
+def empty_manifest(url=URL):
+    """Manifeste vide : page source, ressources indexées par période "AAAA-MM" et période la plus récente."""
+    return {"page": {"url": url, "etag": None, "last_modified": None}, "ressources": {}, "dernier": None}
+
+
+def load_manifest(manifest_file=MANIFEST_FILE, url=URL):
+    """Lit le manifeste enregistré, ou retourne un manifeste vide s'il n'existe pas."""
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return empty_manifest(url)
+
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Enregistre le manifeste de façon atomique (fichier temporaire puis remplacement)."""
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_file, manifest_file)
+
+
+def period_key(year, month):
+    """Clé d'une période dans le manifeste, ex : period_key(2025, 1) == "2025-01"."""
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def parse_listing(html, pattern=PATTERN):
+    """
+    Extrait les ressources de la page listant les fichiers des décès.
+
+    :return: Liste de dictionnaires (url, href, name, period), dans l'ordre de la page.
+    """
+    ressources = []
+    soup = BeautifulSoup(html, "html.parser") # parser le contenu de la page
+    for link in soup.find_all("a", href=True): # trouver tous les liens avec une URL
+        file_url = link["href"]
+        match = re.search(pattern, file_url) # "deces-AAAA-mMM" : année et mois
+        if match:
+            ressources.append({
+                "url": file_url if file_url.startswith("http") else f"https://www.data.gouv.fr{file_url}",
+                "href": file_url,
+                "name": file_url.split("/")[-1],
+                "period": period_key(match.group(1), match.group(2)),
+            })
+    return ressources
+
+
+def refresh_manifest(url=URL, pattern=PATTERN, manifest_file=MANIFEST_FILE, downloaded_files=None, session=None):
+    """
+    Met à jour le manifeste à partir de la page des fichiers, avec une requête conditionnelle.
+
+    Si la page n'a pas changé (304), le manifeste enregistré est utilisé tel quel, sans analyse HTML.
+    Les ressources déjà connues gardent leur statut, taille et ETag ; les URLs présentes
+    dans downloaded_files (historique des téléchargements) sont marquées téléchargées.
+
+    :return: Le manifeste à jour.
+    """
+    manifest = load_manifest(manifest_file, url)
+    session = session or get_session()
+    headers = {}
+    if manifest["page"].get("etag"):
+        headers["If-None-Match"] = manifest["page"]["etag"]
+    if manifest["page"].get("last_modified"):
+        headers["If-Modified-Since"] = manifest["page"]["last_modified"]
+
+    with stage("manifeste", url) as etape: # durée de la requête et de l'analyse de la page dans le rapport d'exécution
+        try:
+            response = session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) # requête conditionnelle sur la page
+            etape.octets_lus = len(response.content)
+            etape.infos["statut_http"] = response.status_code
+            if response.status_code == 304: # page inchangée : le manifeste est à jour
+                logging.info("🔄 Liste des fichiers inchangée, manifeste réutilisé")
+            else:
+                response.raise_for_status() # Lever une exception pour les codes d'erreur HTTP
+                ressources = manifest["ressources"]
+                for ressource in parse_listing(response.text, pattern):
+                    connue = ressources.get(ressource["period"], {})
+                    if connue.get("url") == ressource["url"]: # ressource déjà connue : on garde son suivi
+                        continue
+                    ressources[ressource["period"]] = dict(ressource, size=None, etag=None, status=A_TELECHARGER)
+                manifest["page"] = {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+                manifest["dernier"] = max(ressources) if ressources else None
+                etape.enregistrements = len(ressources)
+                logging.info(f"✅ Manifeste mis à jour : {len(ressources)} ressources")
+        except requests.exceptions.RequestException as e: # hors ligne : le manifeste enregistré reste utilisable
+            logging.error(f"Erreur réseau: {e}")
+
+    for ressource in manifest["ressources"].values(): # synchronisation avec l'historique des téléchargements
+        if downloaded_files and ressource["url"] in downloaded_files:
+            ressource["status"] = TELECHARGE
+    save_manifest(manifest, manifest_file)
+    return manifest
+
+
+def get_resource(manifest, year, month):
+    """Ressource d'une période, ou None si elle n'est pas (encore) publiée."""
+    return manifest["ressources"].get(period_key(year, month))
+
+
+def latest_resource(manifest):
+    """Ressource la plus récente du manifeste, ou None si le manifeste est vide."""
+    return manifest["ressources"].get(manifest["dernier"]) if manifest["dernier"] else None
+
+
+def is_downloaded(manifest, year, month):
+    """Indique si la ressource d'une période a déjà été téléchargée."""
+    ressource = get_resource(manifest, year, month)
+    return ressource is not None and ressource["status"] == TELECHARGE
+
+
+def pending_resources(manifest):
+    """Ressources pas encore téléchargées, de la plus récente à la plus ancienne."""
+    return [manifest["ressources"][period] for period in sorted(manifest["ressources"], reverse=True)
+            if manifest["ressources"][period]["status"] != TELECHARGE]
+
+
+def mark_downloaded(manifest, full_url, download_dir=DOWNLOAD_DIR, manifest_file=MANIFEST_FILE):
+    """Marque une ressource téléchargée, avec la taille et l'ETag du fichier local, et enregistre le manifeste."""
+    for ressource in manifest["ressources"].values():
+        if ressource["url"] == full_url:
+            file_path = os.path.join(download_dir, ressource["name"])
+            ressource["status"] = TELECHARGE
+            ressource["size"] = os.path.getsize(file_path) if os.path.exists(file_path) else None
+            ressource["etag"] = read_metadata(file_path).get("etag")
+            save_manifest(manifest, manifest_file)
+            return ressource
+    return None
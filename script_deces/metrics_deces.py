@@ -0,0 +1,259 @@
+import os, json, time, logging, cProfile, datetime, resource, threading
+from contextlib import contextmanager
+from config import REPORT_OUTPUT, REPORT_DIR, PROFILE_STAGES
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+_rapports_actifs = [] # rapports d'exécution ouverts, le dernier reçoit les mesures des étapes
+_profil = threading.local() # un seul profileur cProfile actif à la fois par thread
+_etapes_actives = [] # étapes en cours, dont le pic de RSS doit survivre à la remise à zéro par une étape imbriquée
+_etapes_lock = threading.Lock()
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente (RSS) du processus depuis son démarrage, en Mo (ru_maxrss est en Ko sous Linux)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+
+def high_water_rss_mb():
+    """
+    Pic de RSS depuis la dernière remise à zéro (VmHWM, Linux), en Mo ;
+    à défaut, pic depuis le démarrage du processus.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for ligne in f:
+                if ligne.startswith("VmHWM:"):
+                    return round(int(ligne.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def _reset_high_water_rss():
+    """Remet le pic de RSS du processus à la RSS courante (écriture de "5" dans /proc/self/clear_refs, Linux)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError: # autre système : le pic reste celui du processus
+        pass
+
+
+def _start_peak(etape):
+    """Début de la mesure du pic de RSS d'une étape : les pics des étapes en cours sont relevés avant la remise à zéro."""
+    with _etapes_lock:
+        pic = high_water_rss_mb()
+        for active in _etapes_actives:
+            active.pic_rss_mo = max(active.pic_rss_mo or 0, pic)
+        _reset_high_water_rss()
+        _etapes_actives.append(etape)
+
+
+def _end_peak(etape):
+    """Fin de la mesure : pic de RSS atteint depuis le début de l'étape."""
+    with _etapes_lock:
+        etape.pic_rss_mo = max(etape.pic_rss_mo or 0, high_water_rss_mb())
+        if etape in _etapes_actives:
+            _etapes_actives.remove(etape)
+
+
+class Stage:
+    """
+    Mesures d'une étape (téléchargement d'un fichier, extraction, écriture JSON, etc.).
+
+    La durée, le temps CPU du thread et le pic de RSS pendant l'étape (pour tout le processus) sont mesurés
+    par stage() ou timed_iter() ; les octets lus et écrits,
+    le nombre d'enregistrements et les informations complémentaires sont renseignés par le code mesuré.
+    """
+
+    def __init__(self, name, fichier=None):
+        self.name = name
+        self.fichier = fichier
+        self.debut = datetime.datetime.now().isoformat(timespec="seconds")
+        self.secondes = 0.0
+        self.cpu_secondes = 0.0
+        self.octets_lus = 0
+        self.octets_ecrits = 0
+        self.enregistrements = 0
+        self.pic_rss_mo = None
+        self.infos = {} # statut, compteurs, chemin du profil, etc.
+
+    def to_dict(self):
+        return {
+            "etape": self.name,
+            "fichier": self.fichier,
+            "debut": self.debut,
+            "secondes": round(self.secondes, 4),
+            "cpu_secondes": round(self.cpu_secondes, 4),
+            "octets_lus": self.octets_lus,
+            "octets_ecrits": self.octets_ecrits,
+            "enregistrements": self.enregistrements,
+            "enregistrements_par_seconde": round(self.enregistrements / self.secondes) if self.secondes else None,
+            "pic_rss_mo": self.pic_rss_mo,
+            **self.infos,
+        }
+
+
+class RunReport:
+    """
+    Rapport d'exécution : mesures de toutes les étapes d'un lancement (scraper et pipeline), enregistré en JSON.
+
+    Utilisé comme gestionnaire de contexte, le rapport reçoit les mesures des étapes exécutées pendant le bloc
+    (y compris dans d'autres threads) et est enregistré à la sortie du bloc si REPORT_OUTPUT.
+    """
+
+    def __init__(self, nom="run"):
+        self.nom = nom
+        self.debut = datetime.datetime.now()
+        self.fin = None
+        self.etapes = []
+        self.lock = threading.Lock()
+
+    def add(self, etape):
+        with self.lock: # les téléchargements parallèles ajoutent leurs mesures depuis plusieurs threads
+            self.etapes.append(etape)
+
+    def to_dict(self):
+        fin = self.fin or datetime.datetime.now()
+        totaux = {}
+        for etape in self.etapes: # durée cumulée par type d'étape
+            total = totaux.setdefault(etape.name, {"secondes": 0.0, "cpu_secondes": 0.0, "octets_lus": 0, "octets_ecrits": 0, "enregistrements": 0})
+            total["secondes"] = round(total["secondes"] + etape.secondes, 4)
+            total["cpu_secondes"] = round(total["cpu_secondes"] + etape.cpu_secondes, 4)
+            total["octets_lus"] += etape.octets_lus
+            total["octets_ecrits"] += etape.octets_ecrits
+            total["enregistrements"] += etape.enregistrements
+        return {
+            "nom": self.nom,
+            "debut": self.debut.isoformat(timespec="seconds"),
+            "fin": fin.isoformat(timespec="seconds"),
+            "secondes": round((fin - self.debut).total_seconds(), 3),
+            "pic_rss_mo": peak_rss_mb(),
+            "etapes": [etape.to_dict() for etape in self.etapes],
+            "totaux": totaux,
+        }
+
+    def save(self, output_dir=REPORT_DIR):
+        """Enregistre le rapport dans output_dir/rapport-<nom>-<date>.json et retourne le chemin du fichier."""
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, f"rapport-{self.nom}-{self.debut.strftime('%Y%m%dT%H%M%S')}.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+        logging.info(f"✅ Rapport d'exécution : {file_path}")
+        return file_path
+
+    def __enter__(self):
+        _rapports_actifs.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _rapports_actifs.remove(self)
+        self.fin = datetime.datetime.now()
+        if REPORT_OUTPUT:
+            self.save()
+
+
+def active_report():
+    """Rapport d'exécution ouvert le plus récemment, ou None."""
+    return _rapports_actifs[-1] if _rapports_actifs else None
+
+
+@contextmanager
+def report_scope(nom):
+    """Ouvre un rapport d'exécution, sauf si un rapport est déjà ouvert (les mesures vont alors dans ce dernier)."""
+    rapport = active_report()
+    if rapport is not None:
+        yield rapport
+    else:
+        with RunReport(nom) as rapport:
+            yield rapport
+
+
+def _record(etape):
+    """Termine les mesures d'une étape, l'ajoute au rapport ouvert et l'affiche."""
+    _end_peak(etape)
+    rapport = active_report()
+    if rapport is not None:
+        rapport.add(etape)
+    debit = f", {etape.enregistrements / etape.secondes:.0f} enr/s" if etape.enregistrements and etape.secondes else ""
+    logging.info(f"⏱️ {etape.name} {etape.fichier or ''} : {etape.secondes:.2f} s (CPU {etape.cpu_secondes:.2f} s){debit}")
+
+
+def _start_profile(name):
+    """Profileur cProfile (pas encore activé) si l'étape figure dans PROFILE_STAGES, sinon None."""
+    if name in PROFILE_STAGES and not getattr(_profil, "actif", False): # pas de profils imbriqués
+        _profil.actif = True
+        return cProfile.Profile()
+    return None
+
+
+def _save_profile(profileur, etape):
+    """Enregistre les statistiques du profileur dans REPORT_DIR/profil-<étape>-<fichier>.prof."""
+    _profil.actif = False
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    profil_path = os.path.join(REPORT_DIR, f"profil-{etape.name}-{os.path.basename(etape.fichier or 'run')}.prof")
+    profileur.dump_stats(profil_path)
+    etape.infos["profil"] = profil_path
+
+
+@contextmanager
+def stage(name, fichier=None):
+    """
+    Mesure une étape : durée, temps CPU du thread courant et pic de RSS pendant l'étape.
+
+    Les étapes dont le nom figure dans PROFILE_STAGES sont profilées avec cProfile ; les statistiques
+    sont enregistrées dans REPORT_DIR/profil-<étape>-<fichier>.prof (lisibles avec pstats ou snakeviz).
+
+    :param name: Nom de l'étape.
+    :param fichier: Fichier traité par l'étape.
+    :return: Stage, à compléter (octets lus et écrits, enregistrements, infos) pendant l'étape.
+    """
+    etape = Stage(name, fichier)
+    _start_peak(etape)
+    profileur = _start_profile(name)
+    if profileur is not None:
+        profileur.enable()
+    debut, debut_cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield etape
+    finally:
+        etape.secondes = time.perf_counter() - debut
+        etape.cpu_secondes = time.thread_time() - debut_cpu
+        if profileur is not None:
+            profileur.disable()
+            _save_profile(profileur, etape)
+        _record(etape)
+
+
+def timed_iter(data_iter, name, fichier=None):
+    """
+    Mesure le temps passé à produire les éléments d'un itérable (par exemple le parser dans le pipeline en flux),
+    sans compter le temps passé par le consommateur à les traiter. Si l'étape figure dans PROFILE_STAGES,
+    seule la production des éléments est profilée. Le pic de RSS couvre toute la durée de l'itération,
+    consommateur compris (la mémoire est celle du processus).
+    """
+    etape = Stage(name, fichier)
+    _start_peak(etape)
+    profileur = _start_profile(name)
+    iterator = iter(data_iter)
+    perf_counter, thread_time = time.perf_counter, time.thread_time
+    try:
+        while True:
+            debut, debut_cpu = perf_counter(), thread_time()
+            if profileur is not None:
+                profileur.enable()
+            try:
+                data = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                if profileur is not None:
+                    profileur.disable()
+                etape.secondes += perf_counter() - debut
+                etape.cpu_secondes += thread_time() - debut_cpu
+            etape.enregistrements += 1
+            yield data
+    finally:
+        if profileur is not None:
+            _save_profile(profileur, etape)
+        _record(etape)
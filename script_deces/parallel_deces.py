@@ -0,0 +1,109 @@
+import os, shutil, logging
+from concurrent.futures import ProcessPoolExecutor
+from config import PARSER_WORKERS, PARSER_CHUNK_BYTES, PARSER_ENGINE
+from pipeline_deces import (init_counters, iter_data_from_lines, write_datas, output_paths, log_counters, pipeline_streaming, FIELDNAMES)
+from quarantine_deces import QuarantineWriter, quarantine_path, merge_quarantine_parts
+from source_deces import split_lines, is_compressed
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+
+def split_file(FILE_PATH, chunk_bytes=PARSER_CHUNK_BYTES):
+    """
+    Découpe le fichier source en plages d'octets alignées sur les fins de ligne.
+
+    :param FILE_PATH: Chemin du fichier source.
+    :param chunk_bytes: Taille visée (en octets) de chaque plage.
+    :return: Liste de tuples (début, fin) couvrant tout le fichier, dans l'ordre.
+    """
+    size = os.path.getsize(FILE_PATH) # taille du fichier source
+    bornes = [0]
+    with open(FILE_PATH, "rb") as fichier: # lecture binaire pour se positionner à l'octet près
+        while bornes[-1] + chunk_bytes < size:
+            fichier.seek(bornes[-1] + chunk_bytes) # se placer à la taille visée
+            fichier.readline() # avancer jusqu'à la fin de la ligne en cours
+            position = fichier.tell()
+            if position >= size: # la dernière ligne atteint la fin du fichier
+                break
+            bornes.append(position)
+    bornes.append(size)
+    return list(zip(bornes[:-1], bornes[1:]))
+
+
+def parse_range(FILE_PATH, start, end, jsonl_part_path, csv_part_path, quarantine_part_path, engine=PARSER_ENGINE):
+    """
+    Analyse une plage d'octets du fichier source et écrit ses données dans des fichiers morceaux.
+
+    Exécutée dans un processus du pool : les morceaux CSV sont écrits sans en-tête
+    pour pouvoir être concaténés dans l'ordre du fichier source, et les lignes rejetées
+    sont numérotées relativement au début de la plage.
+
+    :return: Les compteurs de la plage (voir init_counters).
+    """
+    counters = init_counters()
+    with open(FILE_PATH, "rb") as fichier:
+        fichier.seek(start)
+        lignes = split_lines(fichier.read(end - start).decode("utf-8")) # lignes complètes de la plage
+    with QuarantineWriter(quarantine_part_path, counters) as quarantine:
+        write_datas(iter_data_from_lines(lignes, engine, counters, quarantine), jsonl_part_path, csv_part_path, header=False)
+    return counters
+
+
+def merge_parts(part_paths, output_path, header=None):
+    """Concatène les fichiers morceaux dans l'ordre puis les supprime."""
+    with open(output_path, "wb") as sortie:
+        if header is not None:
+            sortie.write(header.encode("utf-8"))
+        for part_path in part_paths:
+            with open(part_path, "rb") as part:
+                shutil.copyfileobj(part, sortie, 1024 * 1024) # copie par blocs de 1 Mo
+            os.remove(part_path)
+
+
+def pipeline_parallel(FILE, FILE_PATH, workers=PARSER_WORKERS, chunk_bytes=PARSER_CHUNK_BYTES, engine=PARSER_ENGINE, merge=True):
+    """
+    Pipeline parallèle : le fichier source est découpé en plages analysées par un pool de processus.
+
+    Chaque plage produit ses propres fichiers JSON Lines et CSV (.partNNNN), concaténés ensuite
+    dans l'ordre du fichier source si merge est vrai. Les fichiers de quarantaine des plages sont
+    toujours regroupés, avec les numéros de ligne du fichier source.
+
+    :param FILE: Nom du fichier source.
+    :param FILE_PATH: Chemin du fichier source.
+    :param workers: Nombre de processus (None = nombre de coeurs).
+    :param chunk_bytes: Taille visée (en octets) de chaque plage.
+    :param engine: Moteur d'analyse des lignes ("regex" ou "colonnes").
+    :param merge: Concaténer les morceaux dans les fichiers finaux.
+    :return: Les compteurs cumulés de toutes les plages.
+    """
+    if is_compressed(FILE_PATH): # une archive ne peut pas être découpée en plages d'octets
+        logging.info(f"🔄 Archive compressée, analyse en flux sur un seul processus : {FILE_PATH}")
+        return pipeline_streaming(FILE, FILE_PATH, engine)
+    jsonl_file_path, csv_file_path = output_paths(FILE, FILE_PATH)
+    plages = split_file(FILE_PATH, chunk_bytes) # plages d'octets alignées sur les lignes
+    jsonl_parts = [f"{jsonl_file_path}.part{i:04d}" for i in range(len(plages))]
+    csv_parts = [f"{csv_file_path}.part{i:04d}" for i in range(len(plages))]
+    quarantine_file_path = quarantine_path(FILE)
+    quarantine_parts = [f"{quarantine_file_path}.part{i:04d}" for i in range(len(plages))]
+
+    counters = init_counters()
+    line_offsets = [] # nombre de lignes avant chaque morceau, pour renuméroter les rejets
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(parse_range, FILE_PATH, start, end, jsonl_part, csv_part, quarantine_part, engine)
+            for (start, end), jsonl_part, csv_part, quarantine_part in zip(plages, jsonl_parts, csv_parts, quarantine_parts)
+        ]
+        for future in futures: # résultats récupérés dans l'ordre du fichier source
+            line_offsets.append(counters["lignes"])
+            for key, value in future.result().items():
+                counters[key] = counters.get(key, 0) + value
+    logging.info(f"✅ {len(plages)} morceaux analysés pour {FILE_PATH}")
+    merge_quarantine_parts(quarantine_parts, line_offsets, quarantine_file_path)
+
+    if merge:
+        merge_parts(jsonl_parts, jsonl_file_path)
+        merge_parts(csv_parts, csv_file_path, header=",".join(FIELDNAMES) + "\r\n") # en-tête identique à csv.DictWriter
+        logging.info(f"✅ Téléchargé : {jsonl_file_path}")
+        logging.info(f"✅ Converti en CSV : {csv_file_path}")
+    log_counters(counters, FILE_PATH)
+    return counters
@@ -0,0 +1,114 @@
+import os, logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config import PARQUET_DIR, PARQUET_BATCH_SIZE
+from source_deces import output_stem
+from valeurs_deces import to_null, to_date
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Schéma typé des données décès : dates réelles, sexe catégoriel, communes/pays/codes encodés par dictionnaire
+SCHEMA = pa.schema([
+    ("nom", pa.string()),
+    ("prénoms", pa.string()),
+    ("sexe", pa.dictionary(pa.int8(), pa.string())),
+    ("date_naissance", pa.date32()),            # null si la date INSEE est incomplète (jour ou mois à 00)
+    ("CP_naissance", pa.dictionary(pa.int32(), pa.string())),
+    ("commune_naissance", pa.dictionary(pa.int32(), pa.string())),
+    ("pays_naissance", pa.dictionary(pa.int32(), pa.string())),
+    ("date_deces", pa.date32()),
+    ("CP_deces", pa.dictionary(pa.int32(), pa.string())),
+    ("acte_deces", pa.string()),
+])
+
+
+class PartitionedParquetWriter:
+    """
+    Écrit les données décès en Parquet, partitionné par année et mois de décès.
+
+    Les données sont regroupées par partition et écrites au fil de la lecture : dès que batch_size lignes
+    sont en attente, toutes partitions confondues, les lots de toutes les partitions sont écrits (la mémoire
+    reste bornée même quand chaque mois de décès n'a que quelques lignes). Un fichier par partition et par
+    fichier source, par exemple parquet_files/annee_deces=2024/mois_deces=08/deces-2024-m09.parquet.
+    """
+
+    def __init__(self, source_file_name, output_dir=PARQUET_DIR, batch_size=PARQUET_BATCH_SIZE):
+        self.file_stem = output_stem(source_file_name) # nom du fichier source sans extension .txt
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.buffers = {}  # (année, mois) -> colonnes en attente d'écriture
+        self.writers = {}  # (année, mois) -> ParquetWriter ouvert
+        self.buffered = 0  # lignes en attente d'écriture, toutes partitions confondues
+        self.rows = 0
+
+    def write(self, data):
+        """Ajoute une donnée à la partition de son mois de décès."""
+        partition = (data["date_deces"][:4], data["date_deces"][4:6])
+        colonnes = self.buffers.get(partition)
+        if colonnes is None:
+            colonnes = self.buffers[partition] = {name: [] for name in SCHEMA.names}
+        for name in SCHEMA.names:
+            value = data[name]
+            colonnes[name].append(to_null(value))
+        self.buffered += 1
+        if self.buffered >= self.batch_size: # lot complet : écriture de toutes les partitions
+            self.flush_all()
+
+    def flush(self, partition):
+        """Écrit le lot en attente d'une partition."""
+        colonnes = self.buffers.pop(partition, None)
+        if not colonnes or not colonnes["nom"]:
+            return
+        self.buffered -= len(colonnes["nom"])
+        colonnes["date_naissance"] = [to_date(value) for value in colonnes["date_naissance"]]
+        colonnes["date_deces"] = [to_date(value) for value in colonnes["date_deces"]]
+        table = pa.Table.from_pydict(colonnes, schema=SCHEMA)
+        writer = self.writers.get(partition)
+        if writer is None: # premier lot de la partition : création du fichier
+            annee, mois = partition
+            dossier = os.path.join(self.output_dir, f"annee_deces={annee}", f"mois_deces={mois}")
+            os.makedirs(dossier, exist_ok=True)
+            writer = self.writers[partition] = pq.ParquetWriter(
+                os.path.join(dossier, f"{self.file_stem}.parquet"), SCHEMA, compression="zstd"
+            )
+        writer.write_table(table)
+        self.rows += table.num_rows
+
+    def flush_all(self):
+        """Écrit les lots en attente de toutes les partitions."""
+        for partition in list(self.buffers):
+            self.flush(partition)
+
+    def close(self):
+        """Écrit les lots restants et ferme tous les fichiers."""
+        self.flush_all()
+        for writer in self.writers.values():
+            writer.close()
+        logging.info(f"✅ Parquet : {self.rows} lignes dans {len(self.writers)} partitions de {self.output_dir}")
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def tee_parquet(data_iter, source_file_name):
+    """
+    Écrit les données en Parquet au passage et les renvoie telles quelles.
+
+    Permet d'ajouter la sortie Parquet à un pipeline en flux sans seconde lecture du fichier source.
+    """
+    with PartitionedParquetWriter(source_file_name) as writer:
+        for data in data_iter:
+            writer.write(data)
+            yield data
+
+
+def write_parquet(data_iter, source_file_name):
+    """Écrit toutes les données en Parquet partitionné et retourne le nombre de lignes écrites."""
+    with PartitionedParquetWriter(source_file_name) as writer:
+        for data in data_iter:
+            writer.write(data)
+    return writer.rows
@@ -0,0 +1,168 @@
+import re, csv, logging, unicodedata
+from config import PICKER_MIN_SCORE, PICKER_MAX_CANDIDATES
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Modes de recherche
+EXACT = "exact"          # même nom, mêmes prénoms (dans n'importe quel ordre), même date de naissance
+TOLERANT = "tolerant"    # nom phonétiquement proche, prénoms partiels ou permutés, date à un chiffre près
+
+non_lettres = re.compile(r"[^A-Z ]+")
+
+# Règles phonétiques françaises simplifiées, appliquées dans l'ordre sur un nom normalisé
+REGLES_PHONETIQUES = [
+    (re.compile(r"PH"), "F"), (re.compile(r"GN"), "N"), (re.compile(r"QU"), "K"), (re.compile(r"SCH|CH|SH"), "X"),
+    (re.compile(r"C([EIY])"), r"S\1"), (re.compile(r"G([EIY])"), r"J\1"), (re.compile(r"[CQ]"), "K"),
+    (re.compile(r"Z"), "S"), (re.compile(r"W"), "V"),
+    (re.compile(r"(?<=[AEIOUY])S(?=[AEIOUY])"), "Z"), (re.compile(r"H"), ""),
+    (re.compile(r"BV"), "V"), (re.compile(r"EAU|AU"), "O"), (re.compile(r"(AI|EI|ET|EZ|ER)$"), "E"),
+    (re.compile(r"(?<=.)[DTSX]$"), ""), (re.compile(r"Y"), "I"), (re.compile(r"([A-Z])\1+"), r"\1"),
+    (re.compile(r"(?<=.)[AEIOU]"), ""),
+]
+
+
+def normalize(texte):
+    """Met un nom en majuscules, sans accents, tirets ni apostrophes, avec des espaces simples."""
+    if not texte or texte in ("null", "Null"):
+        return ""
+    texte = unicodedata.normalize("NFKD", texte.upper())
+    texte = "".join(c for c in texte if not unicodedata.combining(c)) # retirer les accents
+    return " ".join(non_lettres.sub(" ", texte).split())
+
+
+def phonetic(texte):
+    """Clé phonétique d'un nom normalisé (ex : "PHILIPPE" et "FILIPE" donnent la même clé)."""
+    cle = texte.replace(" ", "")
+    for regle, remplacement in REGLES_PHONETIQUES:
+        cle = regle.sub(remplacement, cle)
+    return cle
+
+
+def date_variants(date):
+    """Dates à un chiffre près, et avec jour et mois permutés, d'une date AAAAMMJJ."""
+    variantes = {date[:i] + chiffre + date[i + 1:] for i in range(len(date)) for chiffre in "0123456789"}
+    if len(date) == 8:
+        variantes.add(date[:4] + date[6:8] + date[4:6])
+    variantes.discard(date)
+    return variantes
+
+
+class PersonIndex:
+    """
+    Index de blocage des décès pour la recherche de personnes par lots.
+
+    Chaque décès est rangé sous deux clés : (nom normalisé, date de naissance) et
+    (clé phonétique du nom, date de naissance). Une recherche ne compare donc la personne
+    qu'aux quelques décès de ses blocs, au lieu de parcourir tout le fichier.
+    """
+
+    def __init__(self):
+        self.records = [] # (données, nom normalisé, clé phonétique, ensemble des prénoms normalisés)
+        self.par_nom = {}        # (nom normalisé, date) -> indices des décès
+        self.par_phonetique = {} # (clé phonétique, date) -> indices des décès
+
+    def add(self, data):
+        """Ajoute un décès à l'index."""
+        nom = normalize(data["nom"])
+        cle = phonetic(nom)
+        indice = len(self.records)
+        self.records.append((data, nom, cle, frozenset(normalize(data["prénoms"]).split())))
+        self.par_nom.setdefault((nom, data["date_naissance"]), []).append(indice)
+        self.par_phonetique.setdefault((cle, data["date_naissance"]), []).append(indice)
+
+    def candidates(self, nom, cle, date, mode=EXACT):
+        """Indices des décès des blocs de la personne recherchée."""
+        indices = set(self.par_nom.get((nom, date), ()))
+        if mode == TOLERANT:
+            indices.update(self.par_phonetique.get((cle, date), ()))
+            for variante in date_variants(date): # fautes de frappe sur la date, avec ou sans variante d'orthographe du nom
+                indices.update(self.par_nom.get((nom, variante), ()))
+                indices.update(self.par_phonetique.get((cle, variante), ()))
+        return indices
+
+    def match(self, personne, mode=EXACT, min_score=PICKER_MIN_SCORE, limit=PICKER_MAX_CANDIDATES):
+        """
+        Cherche une personne parmi les décès indexés.
+
+        :param personne: Dictionnaire avec au moins nom, prénoms et date_naissance (AAAAMMJJ), sexe optionnel.
+        :param mode: EXACT ou TOLERANT.
+        :param min_score: Score minimum (entre 0 et 1) des candidats retenus.
+        :param limit: Nombre maximum de candidats retenus.
+        :return: Liste de tuples (score, données du décès), du meilleur au moins bon.
+        """
+        nom = normalize(personne["nom"])
+        cle = phonetic(nom)
+        prenoms = frozenset(normalize(personne.get("prénoms", personne.get("prenoms"))).split()) # colonne avec ou sans accent
+        date = (personne["date_naissance"] or "").replace("-", "")
+        sexe = personne.get("sexe")
+
+        resultats = []
+        for indice in self.candidates(nom, cle, date, mode):
+            data, nom_deces, cle_deces, prenoms_deces = self.records[indice]
+            if mode == EXACT:
+                if nom_deces == nom and prenoms_deces == prenoms:
+                    resultats.append((1.0, data))
+                continue
+            if prenoms and prenoms_deces and not prenoms & prenoms_deces: # aucun prénom commun : une autre personne
+                continue
+            score = 0.4 if nom_deces == nom else 0.3 if cle_deces == cle else 0.0
+            if prenoms or prenoms_deces: # prénoms communs, quel que soit leur ordre
+                score += 0.3 * len(prenoms & prenoms_deces) / len(prenoms | prenoms_deces)
+            score += 0.3 if data["date_naissance"] == date else 0.2 # date exacte ou à un chiffre près
+            if sexe and sexe != data["sexe"]:
+                score -= 0.1
+            if score >= min_score:
+                resultats.append((round(score, 3), data))
+        resultats.sort(key=lambda resultat: resultat[0], reverse=True)
+        return resultats[:limit]
+
+
+def build_index(data_iter):
+    """Construit l'index à partir de données décès (parser, fichier CSV ou JSON Lines du pipeline)."""
+    index = PersonIndex()
+    for data in data_iter:
+        index.add(data)
+    logging.info(f"✅ Index de recherche : {len(index.records)} décès")
+    return index
+
+
+def read_csv(csv_file_path):
+    """Lit un fichier CSV (décès produits par le pipeline, ou personnes à rechercher) ligne par ligne."""
+    with open(csv_file_path, "r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def match_file(personnes_file_path, index, output_file_path, mode=EXACT):
+    """
+    Cherche toutes les personnes d'un fichier CSV (colonnes nom, prénoms, date_naissance, sexe optionnel)
+    et écrit les candidats trouvés avec leur score.
+
+    :return: Nombre de personnes trouvées (au moins un candidat).
+    """
+    trouvees, total = 0, 0
+    with open(output_file_path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        for personne in read_csv(personnes_file_path):
+            total += 1
+            candidats = index.match(personne, mode)
+            trouvees += bool(candidats)
+            for score, data in candidats:
+                ligne = {f"recherche_{key}": value for key, value in personne.items()}
+                ligne.update(score=score, **data)
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(ligne))
+                    writer.writeheader()
+                writer.writerow(ligne)
+    logging.info(f"✅ {trouvees}/{total} personnes trouvées ({mode}) : {output_file_path}")
+    return trouvees
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Recherche d'une liste de personnes dans les décès INSEE")
+    parser.add_argument("personnes", help="CSV des personnes à rechercher (nom, prénoms, date_naissance, sexe)")
+    parser.add_argument("deces", help="CSV des décès produit par le pipeline")
+    parser.add_argument("resultats", help="CSV des candidats trouvés")
+    parser.add_argument("--mode", choices=[EXACT, TOLERANT], default=EXACT)
+    args = parser.parse_args()
+    match_file(args.personnes, build_index(read_csv(args.deces)), args.resultats, args.mode)
@@ -1,5 +1,9 @@
-import re, json, pandas as pd, logging
-from config import DOWNLOAD_DIR, PROCESSED_DIR
+import os, re, json, csv, pandas as pd, logging
+from contextlib import ExitStack
+from config import DOWNLOAD_DIR, PROCESSED_DIR, PARSER_ENGINE, PIPELINE_MODE, PARQUET_OUTPUT, DB_OUTPUT, DEDUP_ENABLED
+from quarantine_deces import QuarantineWriter, quarantine_path, PREFIXE_REJET
+from source_deces import iter_line_blocks, csv_file_name, output_stem
+from metrics_deces import stage, timed_iter, report_scope
 
 logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
 
@@ -30,95 +34,337 @@ pattern = re.compile(
     re.VERBOSE
 )
 
-def extract_data_from_file(FILE_PATH): # extraire les données du fichier source
-    data_list = []  # initialisation de la liste des données
-    with open(file=FILE_PATH, mode="r", encoding="utf-8") as fichier: # ouvrir et lire le fichier
-        for ligne in fichier: # pour chaque ligne dans le fichier
-            ligne = re.sub(r'\t', ' ', ligne)  # Remplace les tabulations par des espaces
-            ligne = re.sub(r'\s+', ' ', ligne)  # Remplace plusieurs espaces ou tabulations par un espace unique
-            match = pattern.match(ligne) # appliquer la regex sur chaque ligne
-
-            if match:  # si la ligne correspond au pattern
-                cp_naissance = match.group('CP_naissance') # extraire le code postal de naissance
-                commune_naissance = match.group('commune_naissance') # extraire la commune de naissance
-
-            # cas particulier si le pays n'est pas la france
-                if cp_naissance.startswith(("99", "97")):  # Si le CP commence par 99 ou 97, on attend un pays de naissance étranger sauf exceptions
-                    if not commune_naissance:  # Si la commune est vide,
-                        commune_naissance = "null"
-                        pays_naissance = match.group('pays_naissance') if match.group('pays_naissance') else "null"
-                    else : # Si la commune n'est pas vide,
-                        commune_split = commune_naissance.split() # Séparer les mots de la commune dans une liste
-                        if len(commune_split) > 1:  # Si plusieurs mots,
-                            if commune_split[-2].upper() == "LA":  # Vérifier si l'avant-dernier mot est "LA" exemple: LA REUNION
-                                pays_naissance = " ".join(commune_split[-2:])  # Pays = "LA + dernier mot"
-                                commune_naissance = " ".join(commune_split[:-2])  # Retirer les deux derniers mots
-                            elif commune_split[-2].upper() == "D'":  # Vérifier si l'avant-dernier mot est "D'" exemple: COTE D'IVOIRE
-                                pays_naissance = " ".join(commune_split[-3:])  # Pays = "D' + dernier mot + avant-dernier mot"
-                                commune_naissance = " ".join(commune_split[:-3])  # Retirer les trois derniers mots
-                                print(commune_naissance, pays_naissance)
-                            else:
-                                pays_naissance = commune_split[-1]  # On suppose que le dernier mot est le pays
-                                commune_naissance = " ".join(commune_split[:-1])  # Retirer le pays de la commune
-                        else: # Si un seul mot dans la liste commune,
-                            pays_naissance = commune_naissance  # Si un seul mot dans la liste commune, le pays est la commune
-                            commune_naissance = "null"  # et il n'y a pas de commune
-                if cp_naissance == "99312":  # Cas particulier pour le code 99312
-                    match_congo = re.compile(r"""
-                    (?P<commune_naissance>(?!\s*99\d{3}\s)([()A-ZÉÈÀÇa-z- ',.°"/\d{2}]+?)(?=\W*CONGO\W*))
-                    """,re.VERBOSE).match(commune_naissance)  # Chercher le mot CONGO dans la commune
-                    pays_naissance = "RDC CONGO"  # Le pays est la RDC CONGO
-                    commune_naissance = match_congo.group('commune_naissance') if match_congo else "Null"  # Extraire la commune si pas vide, sinon Null
-
-                else : # autre cas : Si le CP ne commence pas par 99
-                    if not cp_naissance.startswith(("99", "97")):  # Si le CP ne commence par 99 ou 97
-                        pays_naissance = "FRANCE" # Par défaut, le pays est la France (pour tous les CP ne commençant pas par 99 ou )
-                        commune_naissance = commune_naissance.strip()  # Retirer les espaces en début et fin de la commune française
-
-                data = { # stocker les données dans un dictionnaire
-                    "nom": match.group('nom') if match.group('nom') else "Null",
-                    "prénoms": match.group('prenoms') if match.group('prenoms') else "Null",
-                    "sexe": match.group('sexe'),
-                    "date_naissance": match.group('date_naissance'),
-                    "CP_naissance": match.group('CP_naissance'),
-                    "commune_naissance": commune_naissance, #if commune_naissance else "Null",
-                    "pays_naissance": pays_naissance, #if pays_naissance else "Null",
-                    "date_deces": match.group('date_deces'),
-                    "CP_deces": match.group('CP_deces'),
-                    "acte_deces": match.group('acte_deces')
-                }
-                data_list.append(data) # ajouter les données à la liste des données
-
-                #print("ligne bien copiée:", ligne)  # afficher la ligne réécrite
+# Regex de la colonne des noms : "NOM*PRENOMS/" suivi du remplissage
+pattern_noms = re.compile(r"(?P<nom>[A-Z- ']*)\*(?P<prenoms>[A-Z- ']*)/ *\Z")
+
+espaces_multiples = re.compile(r'\s{2,}')
+
+
+def reduire_espaces(texte):
+    """Réduit les espaces multiples à un seul espace, comme le prétraitement de la regex principale."""
+    return espaces_multiples.sub(' ', texte) if "  " in texte else texte
+
+
+# Regex de recherche de la commune devant le mot CONGO (cas du code 99312)
+pattern_congo = re.compile(r"""
+    (?P<commune_naissance>(?!\s*99\d{3}\s)([()A-ZÉÈÀÇa-z- ',.°"/\d{2}]+?)(?=\W*CONGO\W*))
+    """, re.VERBOSE)
+
+
+def normaliser_lieu_naissance(cp_naissance, commune_naissance, pays_naissance):
+    """
+    Sépare la commune et le pays de naissance selon le code lieu de naissance.
+
+    :param cp_naissance: Code lieu de naissance (5 caractères).
+    :param commune_naissance: Texte capturé entre le code lieu et la date de décès.
+    :param pays_naissance: Pays capturé par la regex, ou None.
+    :return: Tuple (commune_naissance, pays_naissance).
+    """
+    # cas particulier si le pays n'est pas la france
+    if cp_naissance.startswith(("99", "97")):  # Si le CP commence par 99 ou 97, on attend un pays de naissance étranger sauf exceptions
+        if not commune_naissance:  # Si la commune est vide,
+            commune_naissance = "null"
+            pays_naissance = pays_naissance if pays_naissance else "null"
+        else : # Si la commune n'est pas vide,
+            commune_split = commune_naissance.split() # Séparer les mots de la commune dans une liste
+            if len(commune_split) > 1:  # Si plusieurs mots,
+                if commune_split[-2].upper() == "LA":  # Vérifier si l'avant-dernier mot est "LA" exemple: LA REUNION
+                    pays_naissance = " ".join(commune_split[-2:])  # Pays = "LA + dernier mot"
+                    commune_naissance = " ".join(commune_split[:-2])  # Retirer les deux derniers mots
+                elif commune_split[-2].upper() == "D'":  # Vérifier si l'avant-dernier mot est "D'" exemple: COTE D'IVOIRE
+                    pays_naissance = " ".join(commune_split[-3:])  # Pays = "D' + dernier mot + avant-dernier mot"
+                    commune_naissance = " ".join(commune_split[:-3])  # Retirer les trois derniers mots
+                else:
+                    pays_naissance = commune_split[-1]  # On suppose que le dernier mot est le pays
+                    commune_naissance = " ".join(commune_split[:-1])  # Retirer le pays de la commune
+            else: # Si un seul mot dans la liste commune,
+                pays_naissance = commune_naissance  # Si un seul mot dans la liste commune, le pays est la commune
+                commune_naissance = "null"  # et il n'y a pas de commune
+    if cp_naissance == "99312":  # Cas particulier pour le code 99312
+        match_congo = pattern_congo.match(commune_naissance)  # Chercher le mot CONGO dans la commune
+        pays_naissance = "RDC CONGO"  # Le pays est la RDC CONGO
+        commune_naissance = match_congo.group('commune_naissance') if match_congo else "Null"  # Extraire la commune si pas vide, sinon Null
+
+    else : # autre cas : Si le CP ne commence pas par 99
+        if not cp_naissance.startswith(("99", "97")):  # Si le CP ne commence par 99 ou 97
+            pays_naissance = "FRANCE" # Par défaut, le pays est la France (pour tous les CP ne commençant pas par 99 ou )
+            commune_naissance = commune_naissance.strip()  # Retirer les espaces en début et fin de la commune française
+    return commune_naissance, pays_naissance
+
+
+def parse_ligne_regex(ligne):
+    """
+    Analyse une ligne du fichier source avec la regex principale.
+
+    :param ligne: Ligne brute du fichier source.
+    :return: Dictionnaire des données du décès, ou None si la ligne n'est pas prise en charge.
+    """
+    ligne = re.sub(r'\t', ' ', ligne)  # Remplace les tabulations par des espaces
+    ligne = re.sub(r'\s+', ' ', ligne)  # Remplace plusieurs espaces ou tabulations par un espace unique
+    match = pattern.match(ligne) # appliquer la regex sur chaque ligne
+    if not match: # si la ligne ne correspond pas au pattern
+        return None
+
+    cp_naissance = match.group('CP_naissance') # extraire le code postal de naissance
+    commune_naissance, pays_naissance = normaliser_lieu_naissance(
+        cp_naissance, match.group('commune_naissance'), match.group('pays_naissance')
+    ) # séparer la commune et le pays de naissance
+
+    return { # stocker les données dans un dictionnaire
+        "nom": match.group('nom') if match.group('nom') else "Null",
+        "prénoms": match.group('prenoms') if match.group('prenoms') else "Null",
+        "sexe": match.group('sexe'),
+        "date_naissance": match.group('date_naissance'),
+        "CP_naissance": cp_naissance,
+        "commune_naissance": commune_naissance, #if commune_naissance else "Null",
+        "pays_naissance": pays_naissance, #if pays_naissance else "Null",
+        "date_deces": match.group('date_deces'),
+        "CP_deces": match.group('CP_deces'),
+        "acte_deces": match.group('acte_deces')
+    }
+
+
+SIECLES_NAISSANCE = frozenset(("18", "19", "20"))
+SIECLES_DECES = frozenset(("19", "20"))
+
+
+def parse_lignes_colonnes(lignes):
+    """
+    Analyse un bloc de lignes du fichier source en découpant directement les colonnes du format fixe INSEE.
+
+    Produit pour chaque ligne le même dictionnaire que parse_ligne_regex : les colonnes sont lues par tranches
+    (ligne[80], ligne[81:89], ligne[89:94], ...) et vérifiées par des tests simples, seuls le nom
+    et le lieu de naissance passent par une regex sans retour arrière. Le bloc est traité en une boucle,
+    sans appel de fonction par ligne.
+
+    Jusqu'au code lieu de naissance, la regex principale ne peut lire la ligne que d'une seule façon :
+    une erreur dans ces colonnes (sexe, date ou code de naissance) rejette la ligne directement.
+    Les lignes hors format fixe (tronquées, tabulées, noms débordant de leur colonne) et celles dont
+    la suite est décalée (pays de plus de 30 caractères, par exemple) repassent par la regex principale.
+
+    :param lignes: Liste de lignes brutes.
+    :return: Liste des dictionnaires de données (None pour les lignes non prises en charge), dans l'ordre des lignes.
+    """
+    resultats = []
+    ajouter = resultats.append
+    match_noms, lieu_valide, regex = pattern_noms.match, valide_lieu, parse_ligne_regex
+    siecles_naissance, siecles_deces = SIECLES_NAISSANCE, SIECLES_DECES
+    for ligne in lignes:
+        if len(ligne) < 167 or "\t" in ligne: # hors format fixe
+            ajouter(regex(ligne))
+            continue
+        noms = match_noms(ligne, 0, 80) # "NOM*PRENOMS/" suivi du remplissage
+        if noms is None:
+            ajouter(regex(ligne))
+            continue
+        sexe, date_naissance, cp_naissance = ligne[80], ligne[81:89], ligne[89:94]
+        # dates AAAAMMJJ (mois 00 à 12, jour 00 à 31) et codes lieu (5 majuscules ou chiffres) vérifiés sans regex
+        if (sexe not in "12" or not (date_naissance.isascii() and date_naissance.isdigit())
+                or date_naissance[:2] not in siecles_naissance or date_naissance[4:6] > "12" or date_naissance[6:] > "31"
+                or not (cp_naissance.isascii() and cp_naissance.isalnum()) or not cp_naissance.isupper() and not cp_naissance.isdigit()):
+            debut = ligne[80:94]
+            # sans espace, la regex lit ces colonnes de la même façon : rejet direct
+            ajouter(None if " " not in debut and debut.isprintable() else regex(ligne))
+            continue
+        lieu_naissance, date_deces, cp_deces = ligne[94:154], ligne[154:162], ligne[162:167]
+        if (not lieu_valide(lieu_naissance) or not (date_deces.isascii() and date_deces.isdigit())
+                or date_deces[:2] not in siecles_deces or date_deces[4:6] > "12" or date_deces[6:] > "31"
+                or not (cp_deces.isascii() and cp_deces.isalnum()) or not cp_deces.isupper() and not cp_deces.isdigit()):
+            ajouter(regex(ligne)) # suite de la ligne décalée ou invalide
+            continue
+
+        nom, prenoms = noms.group('nom', 'prenoms')
+        if "  " in nom:
+            nom = reduire_espaces(nom)
+        if "  " in prenoms:
+            prenoms = reduire_espaces(prenoms)
+
+        acte_deces = ligne[167:172] # 1 à 5 premiers chiffres de la colonne de 9 caractères
+        if not (acte_deces.isascii() and acte_deces.isdigit()):
+            acte_deces = acte_deces.split(" ", 1)[0] # numéro de moins de 5 chiffres
+            if not (acte_deces.isascii() and acte_deces.isdigit()):
+                chiffres = 0
+                while chiffres < len(acte_deces) and acte_deces[chiffres] in "0123456789":
+                    chiffres += 1
+                acte_deces = acte_deces[:chiffres] or None
+
+        if cp_naissance[:2] not in ("97", "99"): # naissance en France : commune sans espaces superflus
+            commune_naissance, pays_naissance = " ".join(lieu_naissance.split()), "FRANCE"
+        else: # espaces réduits comme dans la regex principale : mots séparés par un espace, un espace final conservé
+            commune_naissance = " ".join(lieu_naissance.split())
+            if lieu_naissance[-1] == " ":
+                commune_naissance = commune_naissance + " " if commune_naissance else " "
+            commune_naissance, pays_naissance = normaliser_lieu_naissance(cp_naissance, commune_naissance, None)
+
+        ajouter({
+            "nom": nom if nom else "Null",
+            "prénoms": prenoms if prenoms else "Null",
+            "sexe": sexe,
+            "date_naissance": date_naissance,
+            "CP_naissance": cp_naissance,
+            "commune_naissance": commune_naissance,
+            "pays_naissance": pays_naissance,
+            "date_deces": date_deces,
+            "CP_deces": cp_deces,
+            "acte_deces": acte_deces
+        })
+    return resultats
+
+
+def parse_ligne_colonnes(ligne):
+    """
+    Analyse une ligne du fichier source en découpant les colonnes du format fixe INSEE (voir parse_lignes_colonnes).
+
+    :param ligne: Ligne brute du fichier source.
+    :return: Dictionnaire des données du décès, ou None si la ligne n'est pas prise en charge.
+    """
+    return parse_lignes_colonnes((ligne,))[0]
+
+
+# Validations des colonnes, utilisées seulement pour diagnostiquer les lignes rejetées
+valide_date_naissance = re.compile(r"(18|19|20)\d{2}(0[0-9]|1[0-2])(0[0-9]|[12][0-9]|3[01])\Z").match
+valide_date_deces = re.compile(r"(19|20)\d{2}(0[0-9]|1[0-2])(0[0-9]|[12][0-9]|3[01])\Z").match
+valide_code_lieu = re.compile(r"[A-Z\d]{5}\Z").match
+valide_lieu = re.compile(r"""[()A-ZÉÈÀÇa-z- ',.°"/\d{2}]*\Z""").match
+
+
+def diagnose_ligne(ligne):
+    """
+    Donne la raison du rejet d'une ligne non prise en charge, en vérifiant ses colonnes une à une.
+
+    :param ligne: Ligne brute rejetée par le parser.
+    :return: Code de la raison du rejet (ex : "date_deces_invalide").
+    """
+    contenu = ligne.rstrip("\r\n")
+    if not contenu.strip():
+        return "ligne_vide"
+    noms = contenu[:80].rstrip()
+    if "*" not in noms or "/" not in noms:
+        return "delimiteurs_noms_absents"
+    if not pattern_noms.match(noms):
+        return "noms_invalides"
+    if len(contenu) < 167:
+        return "ligne_tronquee"
+    if contenu[80] not in "12":
+        return "sexe_invalide"
+    if not valide_date_naissance(contenu[81:89]):
+        return "date_naissance_invalide"
+    if not valide_code_lieu(contenu[89:94]):
+        return "code_lieu_naissance_invalide"
+    if not valide_lieu(contenu[94:154]):
+        return "lieu_naissance_invalide"
+    if not valide_date_deces(contenu[154:162]):
+        return "date_deces_invalide"
+    if not valide_code_lieu(contenu[162:167]):
+        return "code_lieu_deces_invalide"
+    return "format_non_reconnu"
+
+
+# Colonnes des données produites par les parsers (en-tête CSV)
+FIELDNAMES = ["nom", "prénoms", "sexe", "date_naissance", "CP_naissance", "commune_naissance",
+              "pays_naissance", "date_deces", "CP_deces", "acte_deces"]
+
+# Moteurs d'analyse disponibles, sélectionnés par PARSER_ENGINE dans config.py
+PARSERS = {
+    "regex": parse_ligne_regex,
+    "colonnes": parse_ligne_colonnes,
+}
+
+# Analyse d'un bloc de lignes par moteur : liste des résultats, dans l'ordre des lignes
+PARSERS_BLOCS = {
+    "regex": lambda lignes: list(map(parse_ligne_regex, lignes)),
+    "colonnes": parse_lignes_colonnes,
+}
+
+
+def init_counters():
+    """Initialise les compteurs collectés pendant la lecture du fichier source."""
+    return {
+        "lignes": 0,                # lignes lues dans le fichier source
+        "prises_en_charge": 0,      # lignes transformées en données
+        "non_prises_en_charge": 0,  # lignes rejetées par le parser
+        "avec_null": 0,             # données contenant au moins une valeur nulle
+    }
+
+
+def iter_data_from_lines(lignes, engine=PARSER_ENGINE, counters=None, quarantine=None):
+    """
+    Analyse des lignes du fichier source et renvoie les données décès une par une.
+
+    Les lignes sont analysées en un bloc par le moteur choisi (voir PARSERS_BLOCS), puis renvoyées une par une.
+
+    :param lignes: Bloc de lignes brutes (liste, ou itérable lu en entier).
+    :param engine: Moteur d'analyse des lignes ("regex" ou "colonnes").
+    :param counters: Dictionnaire de compteurs (voir init_counters) mis à jour au fil de la lecture.
+    :param quarantine: QuarantineWriter recevant les lignes rejetées (par défaut : rejets seulement comptés).
+    :return: Générateur de dictionnaires de données.
+    """
+    parse_bloc = PARSERS_BLOCS[engine] # moteur d'analyse choisi ("regex" ou "colonnes")
+    lignes = lignes if isinstance(lignes, list) else list(lignes)
+    counters = counters if counters is not None else init_counters()
+    own_quarantine = quarantine is None
+    if own_quarantine:
+        quarantine = QuarantineWriter(counters=counters)
+    # compteurs tenus en variables locales pendant le bloc, reportés dans counters à la fin du bloc
+    numero, prises, avec_null = counters["lignes"], 0, 0
+    debut = numero
+    try:
+        for ligne, data in zip(lignes, parse_bloc(lignes)): # pour chaque ligne et son analyse
+            numero += 1
+            if data is not None:  # si la ligne correspond au format attendu
+                prises += 1
+                values = data.values()
+                if None in values or "null" in values: # au moins une valeur nulle
+                    avec_null += 1
+                yield data
             else:
-                logging.info(f"⚠️ Ligne non prise en charge : {ligne}") # afficher un message si la ligne ne correspond pas au pattern
-        #print(f"Nombre de lignes prises en charge : {len(data_list)}") # afficher le nombre de lignes traitées
-        return data_list # retourner la liste des données sous forme de liste
+                quarantine.add(numero, diagnose_ligne(ligne), ligne) # mettre la ligne en quarantaine avec la raison du rejet
+    finally:
+        counters["lignes"] = numero
+        counters["prises_en_charge"] += prises
+        counters["non_prises_en_charge"] += numero - debut - prises
+        counters["avec_null"] += avec_null
+        if own_quarantine:
+            quarantine.close()
+
+
+def iter_data_from_file(FILE_PATH, engine=PARSER_ENGINE, counters=None, quarantine=None):
+    """
+    Lit le fichier source et renvoie les données décès une par une, sans les garder en mémoire.
+
+    :param FILE_PATH: Chemin du fichier source (.txt, ou archive .gz / .zip lue sans décompression sur disque).
+    :param engine: Moteur d'analyse des lignes ("regex" ou "colonnes").
+    :param counters: Dictionnaire de compteurs (voir init_counters) mis à jour au fil de la lecture.
+    :param quarantine: QuarantineWriter recevant les lignes rejetées (par défaut : rejets seulement comptés).
+    :return: Générateur de dictionnaires de données.
+    """
+    counters = counters if counters is not None else init_counters()
+    own_quarantine = quarantine is None
+    if own_quarantine:
+        quarantine = QuarantineWriter(counters=counters)
+    try:
+        for bloc in iter_line_blocks(FILE_PATH): # lire le fichier (.txt par mmap, .gz ou .zip en flux) par blocs de lignes
+            yield from iter_data_from_lines(bloc, engine, counters, quarantine)
+    finally:
+        if own_quarantine:
+            quarantine.close()
+
+
+def extract_data_from_file(FILE_PATH, engine=PARSER_ENGINE, counters=None, quarantine=None): # extraire les données du fichier source
+    return list(iter_data_from_file(FILE_PATH, engine, counters, quarantine)) # retourner la liste des données sous forme de liste
+
 
 # Fonction pour télécharger les données dans un fichier JSON
 def download_datas(data_list, source_file_name): # fonction pour télécharger les données dans un fichier JSON
     """écrit les données et les enregistre localement dans un fichier JSON."""
     # Créer un nom de fichier JSON dynamique basé sur le nom du fichier texte
-    json_file_name = f"{source_file_name.split('.')[0]}.json"  # Enlève l'extension du fichier txt et ajoute .json
+    json_file_name = f"{output_stem(source_file_name)}.json"  # Enlève l'extension du fichier txt et ajoute .json
     json_file_path = DOWNLOAD_DIR + '/' + json_file_name  # définir le chemin du fichier JSON
     with open(json_file_path, "w", encoding="utf-8") as f:  # ouvrir le fichier en mode texte
         json.dump(data_list, f, ensure_ascii=False, indent=4)  # écrire les données au format JSON
     logging.info(f"✅ Téléchargé : {json_file_path}")  # afficher un message de succès
     return json_file_path  # retourner le chemin du fichier JSON
 
-def count_lines(data_list, source_file_path):
-    count_data = len(data_list) # Compter le nombre de lignes traitées
-    with open(source_file_path, "r", encoding="utf-8") as file:
-        count = sum(1 for line in file) # Compter le nombre de lignes dans le fichier source
-        lines_omit = count - count_data # Calculer le nombre de lignes non prises en charge
-        count_null = sum(1 for data in data_list if any(value is None or value == "null" for value in data.values()))
-        logging.info(f"Nombre de lignes dans le fichier source {source_file_path} : {count}")
-        logging.info(f"Nombre de lignes traitées : {count_data}")
-        logging.info(f"Nombre de lignes non prises en charge : {lines_omit}")
-        logging.info(f"nombre de lignes avec une valeur null : {count_null}")
-        logging.info(f"pourcentage non pris en charge: {lines_omit/count * 100:.2f}%")
-
-
 def json_to_csv(json_data, csv_file_path):
     """
     Convertit un fichier JSON en fichier CSV.
@@ -126,17 +372,168 @@ def json_to_csv(json_data, csv_file_path):
     :param json_data: Données JSON sous forme de liste de dictionnaires.
     :param csv_file_path: Chemin du fichier CSV de sortie.
     """
-    csv_file_path = csv_file_path.split('/')[-1].replace(".txt", ".csv")
+    csv_file_path = csv_file_name(csv_file_path) # nom du fichier source, extension .csv
     csv_file_path = DOWNLOAD_DIR + '/' + csv_file_path
     df = pd.DataFrame(json_data)
     df.to_csv(csv_file_path, index=False)
     logging.info(f"✅ Converti en CSV : {csv_file_path}")
+    return csv_file_path
+
+def write_datas(data_iter, jsonl_file_path, csv_file_path, header=True):
+    """
+    Écrit les données au fil de l'eau dans un fichier JSON Lines et un fichier CSV.
+
+    :param data_iter: Itérable de dictionnaires de données.
+    :param jsonl_file_path: Chemin du fichier JSON Lines de sortie.
+    :param csv_file_path: Chemin du fichier CSV de sortie.
+    :param header: Écrire l'en-tête CSV (False pour des morceaux destinés à être concaténés).
+    """
+    with open(jsonl_file_path, "w", encoding="utf-8") as f_json, open(csv_file_path, "w", encoding="utf-8", newline="") as f_csv:
+        writer = csv.DictWriter(f_csv, fieldnames=FIELDNAMES)
+        if header:
+            writer.writeheader()
+        for data in data_iter:
+            f_json.write(json.dumps(data, ensure_ascii=False) + "\n") # une donnée JSON par ligne
+            writer.writerow(data)
+
+
+def output_paths(source_file_name, source_file_path):
+    """Chemins des fichiers JSON Lines et CSV produits à partir du fichier source."""
+    jsonl_file_path = DOWNLOAD_DIR + '/' + f"{output_stem(source_file_name)}.jsonl"  # même nom que le fichier JSON, extension .jsonl
+    csv_file_path = DOWNLOAD_DIR + '/' + csv_file_name(source_file_path)  # même nom que dans json_to_csv
+    return jsonl_file_path, csv_file_path
+
+
+def stream_datas(data_iter, source_file_name, source_file_path):
+    """
+    Écrit les données au fil de l'eau dans un fichier JSON Lines et un fichier CSV, en une seule passe.
+
+    :param data_iter: Itérable de dictionnaires de données (par exemple iter_data_from_file).
+    :param source_file_name: Nom du fichier source, utilisé pour nommer le fichier JSON Lines.
+    :param source_file_path: Chemin du fichier source, utilisé pour nommer le fichier CSV.
+    :return: Tuple (chemin du fichier JSON Lines, chemin du fichier CSV).
+    """
+    jsonl_file_path, csv_file_path = output_paths(source_file_name, source_file_path)
+    write_datas(data_iter, jsonl_file_path, csv_file_path)
+    logging.info(f"✅ Téléchargé : {jsonl_file_path}")
+    logging.info(f"✅ Converti en CSV : {csv_file_path}")
+    return jsonl_file_path, csv_file_path
+
+
+def log_counters(counters, source_file_path):
+    """Affiche les compteurs collectés pendant la lecture, sans relire le fichier source."""
+    count = counters["lignes"]
+    logging.info(f"Nombre de lignes dans le fichier source {source_file_path} : {count}")
+    logging.info(f"Nombre de lignes traitées : {counters['prises_en_charge']}")
+    logging.info(f"Nombre de lignes non prises en charge : {counters['non_prises_en_charge']}")
+    logging.info(f"nombre de lignes avec une valeur null : {counters['avec_null']}")
+    if count:
+        logging.info(f"pourcentage non pris en charge: {counters['non_prises_en_charge']/count * 100:.2f}%")
+    if "doublons" in counters:
+        logging.info(f"Nombre de doublons écartés : {counters['doublons']}")
+    for key in sorted(counters):
+        if key.startswith(PREFIXE_REJET): # rejets par raison
+            logging.info(f"rejets {key[len(PREFIXE_REJET):]} : {counters[key]}")
+
+
+def tee_outputs(data_iter, FILE, FILE_PATH, counters, stack):
+    """
+    Branche les sorties optionnelles sur le flux de données : dédoublonnage (DEDUP_ENABLED),
+    Parquet (PARQUET_OUTPUT) et base SQLite (DB_OUTPUT, sauf si le fichier y est déjà).
+
+    :param stack: ExitStack fermant l'index de dédoublonnage à la fin du pipeline.
+    :return: Tuple (flux de données à consommer par l'écriture JSON Lines / CSV, index de dédoublonnage ou None).
+    """
+    dedup_index = None
+    if DEDUP_ENABLED: # seuls les décès absents des fichiers précédents sont émis
+        from dedup_deces import DedupIndex, filter_new
+        dedup_index = stack.enter_context(DedupIndex())
+        data_iter = filter_new(data_iter, dedup_index, FILE, counters)
+    if PARQUET_OUTPUT: # sortie Parquet partitionnée écrite au passage
+        from parquet_deces import tee_parquet # import local : pyarrow n'est requis que pour la sortie Parquet
+        data_iter = tee_parquet(data_iter, FILE)
+    if DB_OUTPUT: # chargement en base SQLite au passage, sauf si le fichier y est déjà
+        from bdd_deces import connect, is_loaded, tee_database
+        taille, connection = os.path.getsize(FILE_PATH), connect()
+        try:
+            deja_charge = is_loaded(connection, FILE, taille)
+        finally:
+            connection.close()
+        if not deja_charge:
+            data_iter = tee_database(data_iter, FILE, taille)
+    return data_iter, dedup_index
+
+
+def pipeline_streaming(FILE, FILE_PATH, engine=PARSER_ENGINE):
+    """
+    Pipeline en flux : une seule lecture du fichier source, mémoire constante quelle que soit sa taille.
+
+    Les données passent directement du parser aux fichiers JSON Lines et CSV (et Parquet si PARQUET_OUTPUT,
+    base SQLite si DB_OUTPUT), les doublons d'autres fichiers sources sont écartés si DEDUP_ENABLED,
+    les compteurs sont collectés pendant la lecture. Le rapport d'exécution distingue le temps passé à lire
+    et analyser le fichier source (étape "extraction") de la durée totale (étape "flux").
+    """
+    counters = init_counters()
+    with ExitStack() as stack:
+        etape = stack.enter_context(stage("flux", FILE))
+        quarantine = stack.enter_context(QuarantineWriter(quarantine_path(FILE), counters)) # lignes rejetées et raisons du rejet
+        data_iter = timed_iter(iter_data_from_file(FILE_PATH, engine, counters, quarantine), "extraction", FILE)
+        data_iter, _ = tee_outputs(data_iter, FILE, FILE_PATH, counters, stack) # dédoublonnage, Parquet et base SQLite
+        jsonl_file_path, csv_file_path = stream_datas(data_iter, FILE, FILE_PATH) # lire, transformer et écrire en une passe
+        etape.octets_lus = os.path.getsize(FILE_PATH)
+        etape.octets_ecrits = os.path.getsize(jsonl_file_path) + os.path.getsize(csv_file_path)
+        etape.enregistrements = counters["prises_en_charge"] - counters.get("doublons", 0)
+        etape.infos["compteurs"] = counters
+    log_counters(counters, FILE_PATH) # afficher les compteurs collectés
+    return counters
 
-def pipeline(FILE, FILE_PATH):
-    data_list = extract_data_from_file(FILE_PATH) # extraire les données du fichier source et les stocker dans une liste
-    download_datas(data_list, FILE) # télécharger les données de la liste dans un fichier JSON et retourner le chemin du fichier
-    count_lines(data_list, FILE_PATH) # compter les lignes dans les fichiers source et JSON, les lignes non prises en charge et les lignes avec des valeurs nulles
-    json_to_csv(data_list, FILE_PATH) # convertir le fichier JSON en fichier CSV
+
+def pipeline(FILE, FILE_PATH, mode=PIPELINE_MODE):
+    with report_scope(f"pipeline-{FILE.split('.')[0]}"): # mesures de chaque étape, dans le rapport d'exécution ouvert ou un nouveau
+        if mode == "flux": # pipeline en flux, mémoire constante
+            return pipeline_streaming(FILE, FILE_PATH)
+        if mode == "parallele" and (DEDUP_ENABLED or PARQUET_OUTPUT or DB_OUTPUT): # index, partitions et base partagés entre les morceaux
+            logging.warning("⚠️ DEDUP_ENABLED, PARQUET_OUTPUT et DB_OUTPUT ne sont pas pris en charge en mode parallele : traitement en mode flux")
+            return pipeline_streaming(FILE, FILE_PATH)
+        if mode == "parallele": # pipeline en flux réparti sur plusieurs processus
+            from parallel_deces import pipeline_parallel # import local : parallel_deces dépend de ce module
+            with stage("parallele", FILE) as etape: # temps CPU des processus de travail non compris
+                counters = pipeline_parallel(FILE, FILE_PATH)
+                etape.octets_lus = os.path.getsize(FILE_PATH)
+                etape.octets_ecrits = sum(os.path.getsize(path) for path in output_paths(FILE, FILE_PATH) if os.path.exists(path))
+                etape.enregistrements = counters["prises_en_charge"]
+                etape.infos["compteurs"] = counters
+            return counters
+        return pipeline_list(FILE, FILE_PATH)
+
+
+def pipeline_list(FILE, FILE_PATH):
+    """
+    Pipeline historique : données gardées en mémoire, JSON indenté puis CSV pandas, chaque étape mesurée.
+
+    Les doublons d'autres fichiers sources sont écartés de la liste si DEDUP_ENABLED, et la liste est
+    écrite aussi en Parquet (PARQUET_OUTPUT) et en base SQLite (DB_OUTPUT) avant l'écriture JSON.
+    """
+    counters = init_counters()
+    with stage("extraction", FILE) as etape, QuarantineWriter(quarantine_path(FILE), counters) as quarantine: # lignes rejetées et raisons du rejet
+        data_list = extract_data_from_file(FILE_PATH, counters=counters, quarantine=quarantine) # extraire les données du fichier source et les stocker dans une liste
+        etape.octets_lus, etape.enregistrements = os.path.getsize(FILE_PATH), len(data_list)
+    if DEDUP_ENABLED or PARQUET_OUTPUT or DB_OUTPUT:
+        with stage("sorties", FILE) as etape, ExitStack() as stack:
+            data_iter, _ = tee_outputs(data_list, FILE, FILE_PATH, counters, stack) # dédoublonnage, Parquet et base SQLite
+            data_list = list(data_iter)
+            etape.enregistrements = len(data_list)
+    with stage("json", FILE) as etape:
+        json_file_path = download_datas(data_list, FILE) # télécharger les données de la liste dans un fichier JSON et retourner le chemin du fichier
+        etape.octets_ecrits, etape.enregistrements = os.path.getsize(json_file_path), len(data_list)
+    with stage("comptage", FILE) as etape:
+        log_counters(counters, FILE_PATH) # lignes lues, prises en charge, rejetées (par raison) et avec valeurs nulles, collectées pendant la lecture
+        etape.enregistrements = counters["lignes"]
+        etape.infos["compteurs"] = counters
+    with stage("csv", FILE) as etape:
+        csv_file_path = json_to_csv(data_list, FILE_PATH) # convertir le fichier JSON en fichier CSV
+        etape.octets_ecrits, etape.enregistrements = os.path.getsize(csv_file_path), len(data_list)
+    return counters
 
 
 # Remarques
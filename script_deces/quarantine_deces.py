@@ -0,0 +1,90 @@
+import os, logging
+from config import DOWNLOAD_DIR, QUARANTINE_BUFFER_SIZE, QUARANTINE_LOG_SAMPLE
+from source_deces import output_stem
+
+logging.basicConfig(level=logging.INFO)  # Configurer le logging pour afficher les messages INFO
+
+# Préfixe des compteurs de rejets par raison (ex : "rejet_date_deces_invalide")
+PREFIXE_REJET = "rejet_"
+
+
+def quarantine_path(source_file_name):
+    """Chemin du fichier de quarantaine des lignes rejetées d'un fichier source."""
+    return DOWNLOAD_DIR + '/' + f"{output_stem(source_file_name)}.rejets.tsv"
+
+
+class QuarantineWriter:
+    """
+    Enregistre les lignes rejetées par le parser avec leur numéro de ligne et la raison du rejet.
+
+    Les lignes sont écrites par lots dans un fichier TSV (numero_ligne, raison, ligne), les rejets
+    sont comptés par raison dans les compteurs du pipeline, et seul un échantillon des premiers
+    rejets est affiché dans les logs. Sans chemin de fichier, les rejets sont seulement comptés.
+    Avec append, les rejets sont ajoutés à un fichier existant (reprise d'un traitement interrompu).
+    """
+
+    def __init__(self, path=None, counters=None, buffer_size=QUARANTINE_BUFFER_SIZE, log_sample=QUARANTINE_LOG_SAMPLE, append=False):
+        self.path = path
+        self.counters = counters if counters is not None else {}
+        self.buffer_size = buffer_size
+        self.log_sample = log_sample
+        self.buffer = []
+        self.total = 0
+        self.file = open(path, "a" if append else "w", encoding="utf-8") if path else None
+        if self.file and not append:
+            self.file.write("numero_ligne\traison\tligne\n")
+
+    def add(self, numero_ligne, raison, ligne):
+        """Met une ligne rejetée en quarantaine."""
+        cle = PREFIXE_REJET + raison
+        self.counters[cle] = self.counters.get(cle, 0) + 1
+        self.total += 1
+        ligne = ligne.rstrip("\r\n")
+        if self.total <= self.log_sample: # échantillon limité dans les logs
+            logging.info(f"⚠️ Ligne {numero_ligne} non prise en charge ({raison}) : {ligne}")
+        if self.file:
+            self.buffer.append(f"{numero_ligne}\t{raison}\t{ligne.replace(chr(9), ' ')}\n")
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+
+    def flush(self):
+        """Écrit les lignes en attente dans le fichier de quarantaine."""
+        if self.file:
+            if self.buffer:
+                self.file.writelines(self.buffer)
+                self.buffer = []
+            self.file.flush() # taille du fichier à jour pour les points de reprise
+
+    def close(self):
+        """Écrit les lignes restantes, ferme le fichier et résume les rejets dans les logs."""
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+        if self.total > self.log_sample:
+            logging.info(f"⚠️ {self.total - self.log_sample} autres lignes non prises en charge non affichées"
+                         + (f", voir {self.path}" if self.path else ""))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def merge_quarantine_parts(part_paths, line_offsets, output_path):
+    """
+    Concatène les fichiers de quarantaine des morceaux du pipeline parallèle.
+
+    Les numéros de ligne de chaque morceau sont relatifs au morceau : ils sont décalés
+    du nombre de lignes des morceaux précédents (line_offsets).
+    """
+    with open(output_path, "w", encoding="utf-8") as sortie:
+        sortie.write("numero_ligne\traison\tligne\n")
+        for part_path, offset in zip(part_paths, line_offsets):
+            with open(part_path, "r", encoding="utf-8") as part:
+                next(part, None) # ignorer l'en-tête du morceau
+                for rejet in part:
+                    numero, reste = rejet.split("\t", 1)
+                    sortie.write(f"{int(numero) + offset}\t{reste}")
+            os.remove(part_path)
@@ -1,9 +1,8 @@
-import requests
-from bs4 import BeautifulSoup
 import os
-import re
 from dotenv import load_dotenv
-from config import DOWNLOAD_DIR, HISTORY_FILE, CHUNK_SIZE, URL, PATTERN
+from config import DOWNLOAD_DIR, HISTORY_FILE, CHUNK_SIZE, URL, PATTERN, DOWNLOAD_WORKERS
+from download_deces import download, download_many, ERREUR
+from manifest_deces import refresh_manifest, pending_resources, mark_downloaded, get_resource, latest_resource, is_downloaded, TELECHARGE
 import logging, datetime
 
 load_dotenv() # Charger les variables d'environnement
@@ -39,17 +38,8 @@ def add_to_downloaded_files(url): # Ajouter une URL au fichier de suivi
         file.write(url + "\n") # écrire l'URL suivie d'un retour à la ligne
 
 def download_file(url, file_name): # Télécharger un fichier et l'enregistrer localement
-    """Télécharge un fichier et l'enregistre localement."""
-    response = requests.get(url, stream=True) # effectuer une requête GET en mode streaming
-    file_path = os.path.join(DOWNLOAD_DIR, file_name) # définir le chemin du fichier à télécharger
-
-    if response.status_code == 200: # Si la requête est un succès
-        with open(file_path, "wb") as file: # ouvrir le fichier en mode écriture binaire
-            for chunk in response.iter_content(CHUNK_SIZE): # itérer sur les chunks de 1024 octets
-                file.write(chunk) # écrire chaque chunk dans le fichier
-        logging.info(f"✅ Téléchargé : {file_name}") # afficher un message de succès
-    else:
-        logging.info(f"❌ Erreur {response.status_code} pour {url}") # afficher un message d'erreur
+    """Télécharge un fichier et l'enregistre localement (reprenable, conditionnel et atomique, voir download_deces)."""
+    return download(url, file_name, DOWNLOAD_DIR, chunk_size=CHUNK_SIZE) # session partagée, blocs de CHUNK_SIZE octets
 
 def get_previous_month_and_year(current_year=current_year, current_month=current_month):
     """
@@ -98,78 +88,88 @@ def check_file_matches_previous_month(filename, current_year=current_year, curre
     return filename == expected_filename
 
 
-def extract_first_file_from_page(full_url_matching): # Fonction principale pour scraper la page et télécharger les fichiers
-    """Scrape la page, télécharge les nouveaux fichiers et met à jour l'historique."""
+def extract_first_file_from_page(full_url_matching, manifest=None): # Fonction principale pour scraper la page et télécharger les fichiers
+    """Télécharge le fichier trouvé sur la page s'il est nouveau et met à jour l'historique et le manifeste."""
     # Lire les fichiers déjà traités
     downloaded_files = read_downloaded_files()
-
-    # Télécharger et parser la page HTML
-    response = requests.get(URL) # effectuer une requête GET sur l'URL
     full_url = full_url_matching
 
     if full_url in downloaded_files: # Vérifier si le fichier a déjà été traité
         logging.info(f"🔄 Déjà téléchargé : {full_url}") # afficher un message de statut
     else:
         file_name = full_url_matching.split("/")[-1]  # Extraire le nom du fichier
-        download_file(full_url, file_name) # Télécharger le fichier
-        add_to_downloaded_files(full_url) # Ajouter l'URL au fichier d'historique
+        if download_file(full_url, file_name) != ERREUR: # Télécharger le fichier
+            add_to_downloaded_files(full_url) # Ajouter l'URL au fichier d'historique
+            if manifest is not None:
+                mark_downloaded(manifest, full_url) # Mettre à jour le manifeste (statut, taille, ETag)
 
 
-def find_first_matching_file(url=URL, pattern=PATTERN, downloaded_files=DOWNLOAD_DIR):
+def find_first_matching_file(url=URL, pattern=PATTERN, downloaded_files=None, manifest=None):
     """
-    Trouve le premier lien correspondant au pattern et non déjà téléchargé.
+    Trouve le fichier le plus récent correspondant au pattern et non déjà téléchargé.
+
+    La page n'est pas analysée à chaque appel : le manifeste des ressources est rafraîchi
+    par une requête conditionnelle (et synchronisé avec l'historique des téléchargements),
+    puis la ressource la plus récente est lue directement dans le manifeste.
 
     Args:
         url (str): URL de la page.
         pattern (str): Pattern regex.
-        downloaded_files (set): Ensemble des fichiers déjà téléchargés.
+        downloaded_files (set): Ensemble des fichiers déjà téléchargés (par défaut l'historique).
+        manifest (dict): Manifeste déjà rafraîchi (par défaut rafraîchi ici).
 
     Returns:
-        str: L'URL complète du premier fichier correspondant, ou None si aucun.
+        tuple: L'URL complète et le lien du premier fichier correspondant, ou None si aucun.
     """
+    if downloaded_files is None: # par défaut, l'historique des fichiers téléchargés
+        downloaded_files = read_downloaded_files()
     try:
-        response = requests.get(url) # Effectuer une requête GET sur l'URL
-        response.raise_for_status() # Lever une exception pour les codes d'erreur HTTP
-        soup = BeautifulSoup(response.text, "html.parser") # Parser le contenu de la réponse
-
-        for link in soup.find_all("a", href=True): # Trouver tous les liens avec une URL
-            file_url = link["href"] # Extraire l'URL du lien
-            if re.search(pattern, file_url): # Vérifier si le lien correspond au pattern
-                full_url = ( # Construire l'URL complète
-                    file_url
-                    if file_url.startswith("http")
-                    else f"https://www.data.gouv.fr{file_url}"
-                )
-                if full_url not in downloaded_files: # Vérifier si le fichier n'a pas déjà été téléchargé
-                    return full_url, file_url  # Retourne l'url du fichier dès qu'on trouve le premier
-
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Erreur réseau: {e}")
+        if manifest is None:
+            manifest = refresh_manifest(url, pattern, downloaded_files=downloaded_files) # requête conditionnelle sur la page
+        ressource = latest_resource(manifest) # période la plus récente publiée
+        if ressource is not None and ressource["status"] != TELECHARGE:
+            return ressource["url"], ressource["href"]
+        en_attente = pending_resources(manifest) # fichier plus ancien jamais téléchargé (échec d'un lancement précédent)
+        if en_attente:
+            return en_attente[0]["url"], en_attente[0]["href"]
+
     except Exception as e:
         logging.error(f"Erreur inattendue: {e}")
 
     return None  # Aucun fichier trouvé
 
-def first_file_matching_date(url=URL, pattern=PATTERN, downloaded_files=DOWNLOAD_DIR):
-    full_url, file_url = find_first_matching_file() # Trouver le premier fichier correspondant (URL complète et nom du fichier)
-    if full_url is not None: # Si un fichier correspondant est trouvé
-        filename = file_url.split("/")[-1] # Extraire le nom du fichier seulement
-        check = check_file_matches_previous_month(filename, current_year, current_month) # Exécuter la fonction de vérification sur le nom du fichier
-        if check is not None: # Si le fichier correspond au mois précédent
-            return full_url # Retourner l'URL complète et le nom du fichier
-        else:
-            logging.info(f"Le fichier '{full_url}' NE correspond PAS au mois précédent.") # Afficher un message d'information
+def first_file_matching_date(url=URL, pattern=PATTERN, downloaded_files=None, manifest=None):
+    """
+    Trouve le fichier du mois précédent dans le manifeste (indexé par période), s'il n'est pas déjà téléchargé.
+
+    Returns:
+        str: L'URL complète du fichier du mois précédent, ou None s'il n'est pas publié ou déjà téléchargé.
+    """
+    if manifest is None:
+        manifest = refresh_manifest(url, pattern, downloaded_files=read_downloaded_files() if downloaded_files is None else downloaded_files)
+    year, previous_month = get_previous_month_and_year(current_year, current_month)
+    if year is None: # si erreur dans l'année
+        return None
+    ressource = get_resource(manifest, year, previous_month) # recherche directe par (année, mois)
+    if ressource is None:
+        logging.info(f"Le fichier du mois {previous_month:02d}/{year} n'est pas encore publié.") # Afficher un message d'information
+        return None
+    if is_downloaded(manifest, year, previous_month):
+        logging.info(f"🔄 Déjà téléchargé : {ressource['url']}")
+        return None
+    return ressource["url"] # Retourner l'URL complète du fichier
 
 
 def extract_last_file():
-    full_url_matching = first_file_matching_date() # Trouver le premier fichier correspondant au mois précédent
-    file_url_name = full_url_matching.split("/")[-1] # Extraire le nom du fichier seulement
+    manifest = refresh_manifest(downloaded_files=read_downloaded_files()) # une seule requête (conditionnelle) sur la page
+    full_url_matching = first_file_matching_date(manifest=manifest) # Trouver le premier fichier correspondant au mois précédent
     if full_url_matching is None: # Si aucun fichier correspondant n'est trouvé
         logging.info("Aucun fichier correspondant au mois précédent n'a été trouvé.")
         return
     else:
+        file_url_name = full_url_matching.split("/")[-1] # Extraire le nom du fichier seulement
         logging.info(f"Le fichier '{file_url_name}' correspond au mois précédent.") # Afficher un message d'information
-        extract_first_file_from_page(full_url_matching) # Extraire le premier fichier correspondant
+        extract_first_file_from_page(full_url_matching, manifest) # Extraire le premier fichier correspondant
         logging.info(f"Le fichier '{file_url_name}' a été téléchargé avec succès.") # Afficher un message de succès
         return full_url_matching, file_url_name
 
@@ -178,19 +178,12 @@ def extract_all_files_from_page(): # Fonction principale pour scraper la page et
     # Lire les fichiers déjà traités
     downloaded_files = read_downloaded_files()
 
-    # Télécharger et parser la page HTML
-    response = requests.get(URL) # effectuer une requête GET sur l'URL
-    soup = BeautifulSoup(response.text, "html.parser") # parser le contenu de la réponse
-
-    # Extraire tous les liens remplacer les deux prochaines lignes par ces deux lignes :
-    for link in soup.find_all("a", href=True): # trouver tous les liens avec une URL
-        file_url = link["href"] # extraire l'URL du lien
-        if re.search(PATTERN, file_url):  # Vérifier si le lien correspond au pattern
-            full_url = file_url if file_url.startswith("http") else f"https://www.data.gouv.fr{file_url}" # construire l'URL complète
-
-            if full_url in downloaded_files: # Vérifier si le fichier a déjà été traité
-                logging.info(f"🔄 Déjà téléchargé : {full_url}") # afficher un message de statut
-            else:
-                file_name = file_url.split("/")[-1]  # Extraire le nom du fichier
-                download_file(full_url, file_name) # Télécharger le fichier
-                add_to_downloaded_files(full_url) # Ajouter l'URL au fichier d'historique
+    # Rafraîchir le manifeste des fichiers publiés (requête conditionnelle sur la page)
+    manifest = refresh_manifest(downloaded_files=downloaded_files)
+    to_download = [(ressource["url"], ressource["name"]) for ressource in pending_resources(manifest)] # fichiers à télécharger (URL complète, nom du fichier), historique déjà synchronisé
+
+    statuses = download_many(to_download, DOWNLOAD_DIR, DOWNLOAD_WORKERS, CHUNK_SIZE) # Télécharger les fichiers en parallèle
+    for full_url, status in statuses.items():
+        if status != ERREUR: # les échecs ne sont pas historisés, ils seront repris au prochain lancement
+            add_to_downloaded_files(full_url) # Ajouter l'URL au fichier d'historique
+            mark_downloaded(manifest, full_url) # Mettre à jour le manifeste (statut, taille, ETag)
@@ -0,0 +1,104 @@
+import io, os, gzip, mmap, zipfile
+from config import PARSER_BLOCK_SIZE
+
+# Extensions des fichiers sources compressés pris en charge
+COMPRESSED_EXTENSIONS = (".gz", ".zip")
+
+
+def is_compressed(FILE_PATH):
+    """Indique si le fichier source est une archive .gz ou .zip."""
+    return FILE_PATH.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+def output_stem(FILE_PATH):
+    """
+    Nom de base des fichiers produits à partir d'un fichier source (JSON, CSV, quarantaine, Parquet).
+
+    Un fichier texte perd son extension (deces-2024-m01.txt -> deces-2024-m01), une archive garde son nom complet
+    (deces-2020.zip -> deces-2020.zip) : deux sources de même nom, brute et compressée, ne partagent jamais leurs sorties.
+    """
+    file_name = FILE_PATH.split('/')[-1]
+    return file_name[:-len(".txt")] if file_name.lower().endswith(".txt") else file_name
+
+
+def csv_file_name(FILE_PATH):
+    """Nom du fichier CSV produit à partir d'un fichier source."""
+    return output_stem(FILE_PATH) + ".csv"
+
+
+def split_lines(texte):
+    """
+    Découpe un texte décodé en lignes terminées par "\n", comme la lecture d'un fichier en mode texte
+    (les fins de ligne "\r\n" et "\r" sont ramenées à "\n", contrairement à str.splitlines aucun autre séparateur).
+    """
+    if "\r" in texte:
+        texte = texte.replace("\r\n", "\n").replace("\r", "\n")
+    lignes = texte.split("\n")
+    dernier = lignes.pop()
+    lignes = [ligne + "\n" for ligne in lignes]
+    if dernier: # dernière ligne sans fin de ligne
+        lignes.append(dernier)
+    return lignes
+
+
+def iter_text_blocks(fichier, block_size=PARSER_BLOCK_SIZE):
+    """Lit un fichier texte par blocs de lignes complètes."""
+    yield from iter(lambda: fichier.readlines(block_size), [])
+
+
+def iter_offset_blocks(FILE_PATH, start=0, block_size=PARSER_BLOCK_SIZE):
+    """
+    Lit un fichier texte non compressé par blocs de lignes complètes, à travers un mmap, à partir de l'octet start.
+
+    Chaque bloc fait environ block_size octets et est coupé sur la dernière fin de ligne, puis décodé en une fois.
+    Seule une fenêtre d'un bloc est mappée à la fois (démappée avant de rendre les lignes) : la mémoire
+    résidente reste bornée quelle que soit la taille du fichier.
+
+    :return: Générateur de tuples (position de fin du bloc en octets, lignes du bloc).
+    """
+    with open(FILE_PATH, "rb") as fichier:
+        size, debut = os.fstat(fichier.fileno()).st_size, start
+        while debut < size:
+            base = debut - debut % mmap.ALLOCATIONGRANULARITY # début de la fenêtre, aligné comme l'exige mmap
+            longueur = block_size
+            while True:
+                fin = min(debut + longueur, size)
+                with mmap.mmap(fichier.fileno(), fin - base, access=mmap.ACCESS_READ, offset=base) as mm:
+                    if fin < size:
+                        coupure = mm.rfind(b"\n", debut - base) # dernière fin de ligne du bloc
+                        if coupure < 0: # ligne plus longue que la fenêtre : fenêtre agrandie
+                            longueur *= 2
+                            continue
+                        fin = base + coupure + 1
+                    lignes = split_lines(mm[debut - base:fin - base].decode("utf-8"))
+                break
+            yield fin, lignes
+            debut = fin
+
+
+def iter_mmap_blocks(FILE_PATH, block_size=PARSER_BLOCK_SIZE):
+    """Lit un fichier texte non compressé par blocs de lignes complètes, à travers un mmap."""
+    for _, lignes in iter_offset_blocks(FILE_PATH, 0, block_size):
+        yield lignes
+
+
+def iter_line_blocks(FILE_PATH, block_size=PARSER_BLOCK_SIZE):
+    """
+    Lit un fichier source (.txt, .gz ou .zip) par blocs de lignes, sans décompression sur disque.
+
+    Les archives sont décompressées en flux ; une archive .zip peut contenir plusieurs fichiers,
+    lus l'un après l'autre dans l'ordre de l'archive. Les fichiers non compressés sont lus par mmap.
+    """
+    nom = FILE_PATH.lower()
+    if nom.endswith(".gz"):
+        with gzip.open(FILE_PATH, "rt", encoding="utf-8") as fichier:
+            yield from iter_text_blocks(fichier, block_size)
+    elif nom.endswith(".zip"):
+        with zipfile.ZipFile(FILE_PATH) as archive:
+            for membre in archive.infolist():
+                if membre.is_dir():
+                    continue
+                with archive.open(membre) as brut, io.TextIOWrapper(brut, encoding="utf-8") as fichier:
+                    yield from iter_text_blocks(fichier, block_size)
+    else:
+        yield from iter_mmap_blocks(FILE_PATH, block_size)
@@ -0,0 +1,4 @@
+import os, sys
+
+# Les modules du projet s'importent à plat (from config import ...), comme depuis script_deces/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
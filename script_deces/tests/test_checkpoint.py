@@ -0,0 +1,81 @@
+import os, gzip, shutil
+from functools import partial
+import pytest
+import checkpoint_deces
+import source_deces
+from checkpoint_deces import pipeline_checkpointed, load_checkpoint, find_unprocessed_files
+from pipeline_deces import output_paths
+from quarantine_deces import quarantine_path
+from generator_deces import generate_file
+from config import DOWNLOAD_DIR, PROCESSED_DIR
+
+
+class Interruption(Exception):
+    pass
+
+
+@pytest.fixture
+def dossier(tmp_path, monkeypatch):
+    """Dossier de travail avec downloaded_files/ et processed_files/, blocs et points de reprise de quelques ko."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(PROCESSED_DIR)
+    os.makedirs(DOWNLOAD_DIR)
+    monkeypatch.setattr(checkpoint_deces, "iter_offset_blocks", partial(source_deces.iter_offset_blocks, block_size=4096))
+    monkeypatch.setattr(checkpoint_deces, "iter_line_blocks", partial(source_deces.iter_line_blocks, block_size=4096))
+    return tmp_path
+
+
+def sorties(FILE, FILE_PATH):
+    paths = (*output_paths(FILE, FILE_PATH), quarantine_path(FILE))
+    return [open(path, "rb").read() for path in paths]
+
+
+def interrompre_au_bloc(monkeypatch, numero):
+    """Fait échouer le pipeline au bloc numero, comme un arrêt brutal pendant le traitement."""
+    iter_data_from_lines, appels = checkpoint_deces.iter_data_from_lines, [0]
+
+    def iter_data(*args, **kwargs):
+        appels[0] += 1
+        if appels[0] == numero:
+            raise Interruption()
+        return iter_data_from_lines(*args, **kwargs)
+
+    monkeypatch.setattr(checkpoint_deces, "iter_data_from_lines", iter_data)
+    return iter_data_from_lines
+
+
+@pytest.mark.parametrize("FILE", ["deces-2024-m01.txt", "deces-2024-m01.txt.gz"])
+def test_reprise_apres_interruption(dossier, monkeypatch, FILE):
+    texte = generate_file("deces-2024-m01.source", 3000, seed=1) # ~550 ko, avec des lignes malformées
+    FILE_PATH = DOWNLOAD_DIR + "/" + FILE
+    if FILE.endswith(".gz"):
+        with open(texte, "rb") as source, gzip.open(FILE_PATH, "wb") as archive:
+            shutil.copyfileobj(source, archive)
+    else:
+        shutil.copy(texte, FILE_PATH)
+
+    attendus_compteurs = pipeline_checkpointed(FILE, FILE_PATH, checkpoint_bytes=20000)
+    attendues = sorties(FILE, FILE_PATH)
+    os.remove(checkpoint_deces.checkpoint_path(FILE))
+
+    original = interrompre_au_bloc(monkeypatch, 60)
+    with pytest.raises(Interruption):
+        pipeline_checkpointed(FILE, FILE_PATH, checkpoint_bytes=20000)
+    checkpoint = load_checkpoint(FILE)
+    assert not checkpoint["termine"] and 0 < checkpoint["lignes"] < 3000
+    assert find_unprocessed_files(DOWNLOAD_DIR) == [FILE]
+
+    monkeypatch.setattr(checkpoint_deces, "iter_data_from_lines", original)
+    assert pipeline_checkpointed(FILE, FILE_PATH, checkpoint_bytes=20000) == attendus_compteurs
+    assert sorties(FILE, FILE_PATH) == attendues
+    assert load_checkpoint(FILE)["termine"]
+    assert find_unprocessed_files(DOWNLOAD_DIR) == []
+
+
+def test_sorties_distinctes_pour_une_source_et_son_archive():
+    chemins = {FILE: (*output_paths(FILE, DOWNLOAD_DIR + "/" + FILE), quarantine_path(FILE))
+               for FILE in ("deces-2020.txt", "deces-2020.zip", "deces-2020.txt.gz")}
+    assert chemins["deces-2020.txt"] == ("downloaded_files/deces-2020.jsonl", "downloaded_files/deces-2020.csv",
+                                         "downloaded_files/deces-2020.rejets.tsv")
+    tous = [chemin for paths in chemins.values() for chemin in paths]
+    assert len(set(tous)) == len(tous)
@@ -0,0 +1,46 @@
+import os
+from dedup_deces import DedupIndex, filter_new
+
+BLOOM_BITS = 1 << 16 # filtre de 8 Ko au lieu des 64 Mo de DEDUP_BLOOM_BITS
+
+
+def deces(numero):
+    return {"nom": "DUPONT", "prénoms": "JEAN", "date_naissance": "19400101", "CP_naissance": "33063",
+            "date_deces": "20240404", "CP_deces": "33063", "acte_deces": str(numero)}
+
+
+def emis(db_file, source, records, batch_size=3, bloom_bits=BLOOM_BITS):
+    counters = {}
+    with DedupIndex(str(db_file), batch_size=batch_size, bloom_bits=bloom_bits) as index:
+        sortie = list(filter_new(iter(records), index, source, counters))
+    return sortie, counters["doublons"]
+
+
+def test_doublon_du_meme_fichier_apres_enregistrement(tmp_path):
+    records = [deces(0), deces(1), deces(2), deces(3), deces(0)] # r0 déjà enregistré dans la base au moment du doublon
+    sortie, doublons = emis(tmp_path / "dedup.db", "deces-2024-m01.txt", records)
+    assert sortie == records[:4]
+    assert doublons == 1
+
+
+def test_relance_du_meme_fichier_reemet(tmp_path):
+    records = [deces(0), deces(1), deces(2), deces(3), deces(0)]
+    emis(tmp_path / "dedup.db", "deces-2024-m01.txt", records)
+    sortie, doublons = emis(tmp_path / "dedup.db", "deces-2024-m01.txt", records)
+    assert sortie == records[:4]
+    assert doublons == 1
+
+
+def test_autre_fichier_ecarte(tmp_path):
+    emis(tmp_path / "dedup.db", "deces-2024-m01.txt", [deces(0), deces(1)])
+    sortie, doublons = emis(tmp_path / "dedup.db", "deces-2024.txt", [deces(0), deces(1), deces(2)])
+    assert sortie == [deces(2)]
+    assert doublons == 2
+
+
+def test_filtre_reconstruit_a_la_nouvelle_taille(tmp_path):
+    emis(tmp_path / "dedup.db", "deces-2024-m01.txt", [deces(0), deces(1)])
+    assert os.path.getsize(str(tmp_path / "dedup.db") + ".bloom") == 8 + BLOOM_BITS // 8
+    sortie, doublons = emis(tmp_path / "dedup.db", "deces-2024.txt", [deces(0), deces(2)], bloom_bits=2 * BLOOM_BITS)
+    assert sortie == [deces(2)] and doublons == 1 # filtre enregistré d'une autre taille : reconstruit depuis la base
+    assert os.path.getsize(str(tmp_path / "dedup.db") + ".bloom") == 8 + 2 * BLOOM_BITS // 8
@@ -0,0 +1,116 @@
+import os, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import requests
+from download_deces import download, TELECHARGE, NON_MODIFIE, ERREUR
+
+CONTENU = bytes(range(256)) * 400 # 100 ko
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serveur de test : Range, If-Range, If-None-Match ; coupe le prochain transfert ou décale la plage sur demande."""
+    couper = False
+    decaler = False
+    requetes = []
+
+    def do_GET(self):
+        Handler.requetes.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        debut = 0
+        plage = self.headers.get("Range")
+        if plage and self.headers.get("If-Range", ETAG) == ETAG:
+            debut = int(plage.split("=")[1].rstrip("-"))
+            if debut >= len(CONTENU):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(CONTENU)}")
+                self.end_headers()
+                return
+            if Handler.decaler: # plage ne commençant pas à l'octet demandé
+                debut, Handler.decaler = debut - 10, False
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {debut}-{len(CONTENU) - 1}/{len(CONTENU)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(CONTENU) - debut))
+        self.end_headers()
+        if Handler.couper: # connexion coupée au milieu du transfert
+            Handler.couper = False
+            self.wfile.write(CONTENU[debut:debut + 40000])
+            self.wfile.flush()
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(CONTENU[debut:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    Handler.couper = Handler.decaler = False
+    Handler.requetes = []
+    yield f"http://127.0.0.1:{serveur.server_address[1]}/deces-2024-m01.txt"
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def telecharger(url, dossier):
+    with requests.Session() as session:
+        return download(url, "deces-2024-m01.txt", str(dossier), session=session, chunk_size=4096)
+
+
+def test_reprise_puis_304(url, tmp_path):
+    fichier, part = tmp_path / "deces-2024-m01.txt", tmp_path / "deces-2024-m01.txt.part"
+    Handler.couper = True
+    assert telecharger(url, tmp_path) == ERREUR
+    recus = part.stat().st_size
+    assert not fichier.exists() and 0 < recus < len(CONTENU)
+
+    assert telecharger(url, tmp_path) == TELECHARGE
+    assert Handler.requetes[-1]["Range"] == f"bytes={recus}-" and Handler.requetes[-1]["If-Range"] == ETAG
+    assert fichier.read_bytes() == CONTENU
+    assert not part.exists() and (tmp_path / "deces-2024-m01.txt.meta.json").exists()
+
+    assert telecharger(url, tmp_path) == NON_MODIFIE
+    assert fichier.read_bytes() == CONTENU
+
+
+def test_remplacement_atomique(url, tmp_path):
+    fichier = tmp_path / "deces-2024-m01.txt"
+    fichier.write_bytes(b"ancienne version")
+    Handler.couper = True
+    assert telecharger(url, tmp_path) == ERREUR
+    assert fichier.read_bytes() == b"ancienne version" # le fichier final n'est remplacé qu'une fois le transfert complet
+    assert telecharger(url, tmp_path) == TELECHARGE
+    assert fichier.read_bytes() == CONTENU
+
+
+def test_part_complet_finalise_sur_416(url, tmp_path):
+    (tmp_path / "deces-2024-m01.txt.part").write_bytes(CONTENU) # interruption avant le remplacement du fichier final
+    assert telecharger(url, tmp_path) == TELECHARGE
+    assert Handler.requetes[-1]["Range"] == f"bytes={len(CONTENU)}-"
+    assert (tmp_path / "deces-2024-m01.txt").read_bytes() == CONTENU
+    assert not os.path.exists(tmp_path / "deces-2024-m01.txt.part")
+
+
+def test_part_trop_long_retelecharge(url, tmp_path):
+    (tmp_path / "deces-2024-m01.txt.part").write_bytes(CONTENU + b"en trop")
+    assert telecharger(url, tmp_path) == TELECHARGE
+    assert "Range" not in Handler.requetes[-1]
+    assert (tmp_path / "deces-2024-m01.txt").read_bytes() == CONTENU
+
+
+def test_plage_decalee_retelechargee(url, tmp_path):
+    (tmp_path / "deces-2024-m01.txt.part").write_bytes(CONTENU[:50000])
+    Handler.decaler = True
+    assert telecharger(url, tmp_path) == TELECHARGE
+    assert "Range" not in Handler.requetes[-1]
+    assert (tmp_path / "deces-2024-m01.txt").read_bytes() == CONTENU
@@ -0,0 +1,84 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import requests
+from manifest_deces import refresh_manifest, get_resource, latest_resource, is_downloaded, pending_resources, TELECHARGE, A_TELECHARGER
+
+ETAG = '"page-v1"'
+FICHIERS = ["deces-2024-m11.txt", "deces-2024-m12.txt", "deces-2025-m01.txt"]
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Page des fichiers avec ETag : 304 si la page n'a pas changé."""
+    requetes = []
+
+    def do_GET(self):
+        Handler.requetes.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        base = f"http://127.0.0.1:{self.server.server_address[1]}/fichiers/"
+        liens = "".join(f'<a href="{base}{nom}">{nom}</a>' for nom in FICHIERS) + '<a href="/autre.txt">autre</a>'
+        page = f"<html><body>{liens}</body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    Handler.requetes = []
+    yield f"http://127.0.0.1:{serveur.server_address[1]}/page"
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def rafraichir(url, manifest_file, downloaded_files=None):
+    with requests.Session() as session:
+        return refresh_manifest(url, manifest_file=str(manifest_file), downloaded_files=downloaded_files, session=session)
+
+
+def test_premiere_lecture_puis_304(url, tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    manifest = rafraichir(url, manifest_file)
+    assert sorted(manifest["ressources"]) == ["2024-11", "2024-12", "2025-01"]
+    assert manifest["dernier"] == "2025-01" and manifest["page"]["etag"] == ETAG
+    assert latest_resource(manifest)["name"] == "deces-2025-m01.txt"
+    assert get_resource(manifest, 2024, 12)["url"].endswith("/fichiers/deces-2024-m12.txt")
+    assert get_resource(manifest, 2024, 10) is None
+    assert all(ressource["status"] == A_TELECHARGER for ressource in manifest["ressources"].values())
+
+    assert rafraichir(url, manifest_file) == manifest # page inchangée : manifeste enregistré réutilisé
+    assert Handler.requetes[-1]["If-None-Match"] == ETAG
+
+
+def test_synchronisation_historique(url, tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    manifest = rafraichir(url, manifest_file)
+    historique = {get_resource(manifest, 2025, 1)["url"]}
+    manifest = rafraichir(url, manifest_file, historique) # 304, puis synchronisation avec l'historique
+    assert is_downloaded(manifest, 2025, 1) and not is_downloaded(manifest, 2024, 12)
+    assert [ressource["period"] for ressource in pending_resources(manifest)] == ["2024-12", "2024-11"]
+    assert rafraichir(url, manifest_file)["ressources"]["2025-01"]["status"] == TELECHARGE # statut enregistré
+
+
+def test_fichier_du_mois_precedent(url, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # script_deces crée son dossier de téléchargement à l'import
+    import script_deces
+    manifest = rafraichir(url, tmp_path / "manifest.json")
+    monkeypatch.setattr(script_deces, "current_year", 2025)
+    monkeypatch.setattr(script_deces, "current_month", 1)
+    assert script_deces.first_file_matching_date(manifest=manifest) == get_resource(manifest, 2024, 12)["url"]
+    manifest["ressources"]["2024-12"]["status"] = TELECHARGE
+    assert script_deces.first_file_matching_date(manifest=manifest) is None
+    monkeypatch.setattr(script_deces, "current_month", 3) # février pas encore publié
+    assert script_deces.first_file_matching_date(manifest=manifest) is None
+    assert script_deces.find_first_matching_file(downloaded_files=set(), manifest=manifest)[0] == get_resource(manifest, 2025, 1)["url"]
@@ -0,0 +1,47 @@
+import os
+import pytest
+import metrics_deces
+from metrics_deces import RunReport, stage, timed_iter
+
+linux = pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="pic de RSS par étape : Linux seulement")
+
+
+@pytest.fixture(autouse=True)
+def sans_rapport(monkeypatch):
+    monkeypatch.setattr(metrics_deces, "REPORT_OUTPUT", False) # rapports gardés en mémoire, pas d'écriture dans reports/
+
+
+def allouer(mo):
+    return b"x" * (mo * 1024 * 1024) # pages réellement écrites, donc résidentes
+
+
+@linux
+def test_pic_rss_par_etape():
+    with RunReport("test") as rapport:
+        with stage("lourde"):
+            donnees = allouer(150)
+            del donnees
+        with stage("legere"):
+            pass
+    lourde, legere = rapport.etapes
+    assert lourde.pic_rss_mo - legere.pic_rss_mo > 100 # l'étape suivante ne reprend pas le pic de la précédente
+
+
+@linux
+def test_pic_rss_etapes_imbriquees():
+    with stage("englobante") as englobante:
+        donnees = allouer(150)
+        del donnees
+        with stage("imbriquee") as imbriquee: # remet le pic à zéro pendant l'étape englobante
+            pass
+    assert englobante.pic_rss_mo - imbriquee.pic_rss_mo > 100
+
+
+def test_profil_timed_iter(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_deces, "PROFILE_STAGES", ["extraction"])
+    monkeypatch.setattr(metrics_deces, "REPORT_DIR", str(tmp_path))
+    with RunReport("test") as rapport:
+        assert list(timed_iter((sorted(range(1000, 0, -1)) for _ in range(3)), "extraction", "deces.txt")) != []
+    etape, = rapport.etapes
+    assert etape.enregistrements == 3
+    assert os.path.exists(etape.infos["profil"]) and etape.infos["profil"].startswith(str(tmp_path))
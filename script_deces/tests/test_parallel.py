@@ -0,0 +1,39 @@
+import os, shutil
+from config import DOWNLOAD_DIR
+from generator_deces import generate_file
+from parallel_deces import split_file, pipeline_parallel
+from pipeline_deces import pipeline_streaming, output_paths
+from quarantine_deces import quarantine_path
+
+FILE = "deces-2024-m01.txt"
+
+
+def test_plages_alignees_sur_les_lignes(tmp_path):
+    FILE_PATH = generate_file(str(tmp_path / FILE), 500, seed=3)
+    contenu = open(FILE_PATH, "rb").read()
+    plages = split_file(FILE_PATH, 10000)
+    assert len(plages) > 5
+    assert plages[0][0] == 0 and plages[-1][1] == len(contenu)
+    for (_, fin), (debut, _) in zip(plages, plages[1:]):
+        assert fin == debut and contenu[fin - 1:fin] == b"\n" # plages contiguës, coupées après une fin de ligne
+
+
+def sorties(FILE_PATH):
+    return [open(path, "rb").read() for path in (*output_paths(FILE, FILE_PATH), quarantine_path(FILE))]
+
+
+def test_parallele_identique_au_flux(tmp_path, monkeypatch):
+    source = generate_file(str(tmp_path / FILE), 3000, seed=4) # avec des lignes malformées
+    resultats = {}
+    for mode, pipeline in (("flux", pipeline_streaming),
+                           ("parallele", lambda FILE, FILE_PATH: pipeline_parallel(FILE, FILE_PATH, workers=3, chunk_bytes=20000))):
+        os.makedirs(tmp_path / mode / DOWNLOAD_DIR)
+        monkeypatch.chdir(tmp_path / mode)
+        FILE_PATH = DOWNLOAD_DIR + "/" + FILE
+        shutil.copy(source, FILE_PATH)
+        resultats[mode] = pipeline(FILE, FILE_PATH), sorties(FILE_PATH)
+    assert sorted(os.listdir(DOWNLOAD_DIR)) == sorted(os.listdir(tmp_path / "flux" / DOWNLOAD_DIR)) # morceaux supprimés
+
+    (compteurs_flux, sorties_flux), (compteurs_parallele, sorties_parallele) = resultats["flux"], resultats["parallele"]
+    assert compteurs_parallele == compteurs_flux and compteurs_flux["non_prises_en_charge"] > 0
+    assert sorties_parallele == sorties_flux # ordre des morceaux et renumérotation des rejets
@@ -0,0 +1,19 @@
+import pyarrow.parquet as pq
+from parquet_deces import PartitionedParquetWriter
+
+
+def deces(numero, mois):
+    return {"nom": "DUPONT", "prénoms": "JEAN", "sexe": "1", "date_naissance": "19400100", "CP_naissance": "33063",
+            "commune_naissance": "BORDEAUX", "pays_naissance": "FRANCE", "date_deces": f"2024{mois:02d}04",
+            "CP_deces": "33063", "acte_deces": str(numero)}
+
+
+def test_lignes_en_attente_bornees_toutes_partitions(tmp_path):
+    with PartitionedParquetWriter("deces-2024.txt", str(tmp_path), batch_size=10) as writer:
+        for numero in range(95):
+            writer.write(deces(numero, numero % 12 + 1)) # aucune partition n'atteint seule batch_size
+            assert writer.buffered < 10
+        assert writer.rows == 90
+    table = pq.read_table(tmp_path / "annee_deces=2024" / "mois_deces=01" / "deces-2024.parquet")
+    assert table.num_rows == 8
+    assert table.column("date_naissance").null_count == 8
@@ -0,0 +1,68 @@
+import pytest
+from pipeline_deces import PARSERS, PARSERS_BLOCS, parse_lignes_colonnes
+
+
+def ligne_insee(nom, prenoms, sexe, date_naissance, cp_naissance, commune, pays, date_deces, cp_deces, acte):
+    """Ligne au format fixe INSEE : noms (80), sexe (1), dates (8), codes lieu (5), commune et pays (30 + 30), acte (9)."""
+    return (f"{nom + '*' + prenoms + '/':<80}{sexe}{date_naissance}{cp_naissance}"
+            f"{commune:<30}{pays:<30}{date_deces}{cp_deces}{acte:<9}\n")
+
+
+LIGNES = {
+    "commune_francaise": ligne_insee("HUCHARD", "JEAN CLAUDE ANDRE", "1", "19410420", "01053", "BOURG-EN-BRESSE", "", "20240816", "01053", "1234"),
+    "commune_corse": ligne_insee("LEONETTI", "PAUL", "1", "19300101", "2A004", "AJACCIO", "", "20240102", "2A004", "12"),
+    "outre_mer_la_reunion": ligne_insee("PAYET", "MARIE", "2", "19500312", "97415", "SAINT-PAUL", "LA REUNION", "20240105", "97415", "55"),
+    "outre_mer_sans_pays": ligne_insee("PAYET", "JEAN", "1", "19500312", "97411", "SAINT-DENIS", "", "20240105", "97411", "56"),
+    "etranger_pays_un_mot": ligne_insee("BENALI", "AHMED", "1", "19451101", "99350", "CASABLANCA", "MAROC", "20240120", "13055", "789"),
+    "etranger_cote_d_ivoire": ligne_insee("KOUASSI", "AYA", "2", "19601010", "99326", "ABIDJAN", "COTE D'IVOIRE", "20240220", "75056", "4567"),
+    "etranger_d_apostrophe_separe": ligne_insee("KONAN", "YAO", "1", "19620101", "99326", "BOUAKE", "COTE D' IVOIRE", "20240220", "75056", "4568"),
+    "congo_99312": ligne_insee("MBEKI", "JOSEPH", "1", "19741112", "99312", "KINSHASA", "CONGO (REPUBLIQUE DEMOCRATIQUE", "20240510", "75056", "61612"),
+    "congo_pays_decale": ligne_insee("MBEKI", "ANNE", "2", "19741112", "99312", "KINSHASA", "CONGO (REPUBLIQUE DEMOCRATIQUE)", "20240510", "75056", "61613"),
+    "commune_vide": ligne_insee("MARTIN", "LOUIS", "1", "19200505", "99350", "", "MAROC", "20240301", "31555", "9"),
+    "lieu_vide": ligne_insee("MARTIN", "PAUL", "1", "19200505", "99999", "", "", "20240301", "31555", "10"),
+    "jour_naissance_00": ligne_insee("DURAND", "ANNE", "2", "19300700", "75056", "PARIS", "", "20240304", "75056", "321"),
+    "mois_et_jour_naissance_00": ligne_insee("DURAND", "PIERRE", "1", "19300000", "75056", "PARIS", "", "20240304", "75056", "322"),
+    "nom_compose": ligne_insee("DE LA  FONTAINE", "JEAN-PIERRE", "1", "19350101", "69123", "LYON", "", "20240404", "69123", "77777"),
+    "prenoms_absents": ligne_insee("DUPONT", "", "1", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1"),
+    "acte_alphanumerique": ligne_insee("PETIT", "LUC", "1", "19400101", "59350", "LILLE", "", "20240404", "59350", "12A45"),
+    "acte_absent": ligne_insee("PETIT", "LEA", "2", "19400101", "59350", "LILLE", "", "20240404", "59350", ""),
+}
+
+LIGNES_MALFORMEES = {
+    "ligne_vide": "\n",
+    "ligne_tronquee": ligne_insee("DUPONT", "JEAN", "1", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1")[:120] + "\n",
+    "delimiteur_absent": ligne_insee("DUPONT", "JEAN", "1", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1").replace("*", " "),
+    "nom_accentue": ligne_insee("DUPRÉ", "JEAN", "1", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1"),
+    "date_naissance_invalide": ligne_insee("DUPONT", "JEAN", "1", "19AB0101", "33063", "BORDEAUX", "", "20240404", "33063", "1"),
+    "sexe_invalide": ligne_insee("DUPONT", "JEAN", "3", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1"),
+    "date_deces_invalide": ligne_insee("DUPONT", "JEAN", "1", "19400101", "33063", "BORDEAUX", "", "20241399", "33063", "1"),
+    "tabulation": ligne_insee("DUPONT", "JEAN", "1", "19400101", "33063", "BORDEAUX", "", "20240404", "33063", "1").replace("  ", "\t", 1),
+}
+
+
+@pytest.mark.parametrize("ligne", LIGNES.values(), ids=LIGNES.keys())
+def test_moteurs_identiques(ligne):
+    data = PARSERS["regex"](ligne)
+    assert data is not None
+    assert PARSERS["colonnes"](ligne) == data
+
+
+@pytest.mark.parametrize("ligne", LIGNES_MALFORMEES.values(), ids=LIGNES_MALFORMEES.keys())
+def test_lignes_malformees(ligne):
+    assert PARSERS["colonnes"](ligne) == PARSERS["regex"](ligne)
+
+
+def test_lignes_malformees_rejetees():
+    for nom in ("ligne_vide", "ligne_tronquee", "delimiteur_absent", "nom_accentue", "date_naissance_invalide"):
+        assert PARSERS["colonnes"](LIGNES_MALFORMEES[nom]) is None, nom
+
+
+def test_blocs_identiques():
+    lignes = list(LIGNES.values()) + list(LIGNES_MALFORMEES.values())
+    assert parse_lignes_colonnes(lignes) == PARSERS_BLOCS["regex"](lignes)
+
+
+def test_lieux_de_naissance():
+    assert PARSERS["colonnes"](LIGNES["commune_francaise"])["pays_naissance"] == "FRANCE"
+    assert PARSERS["colonnes"](LIGNES["congo_99312"])["pays_naissance"] == "RDC CONGO"
+    assert PARSERS["colonnes"](LIGNES["congo_99312"])["commune_naissance"] == "KINSHASA"
@@ -0,0 +1,35 @@
+from picker_deces import PersonIndex, phonetic, EXACT, TOLERANT
+
+
+def deces(nom, prenoms, date_naissance, sexe="1"):
+    return {"nom": nom, "prénoms": prenoms, "date_naissance": date_naissance, "sexe": sexe}
+
+
+def index_de(*records):
+    index = PersonIndex()
+    for data in records:
+        index.add(data)
+    return index
+
+
+def test_cle_phonetique_ch():
+    assert phonetic("CHARLES") == phonetic("SHARLES") == phonetic("SCHARLES")
+    assert phonetic("PHILIPPE") == phonetic("FILIPE")
+
+
+def test_exact():
+    index = index_de(deces("DUPONT", "JEAN PIERRE", "19500312"))
+    assert index.match({"nom": "Dupont", "prénoms": "Pierre Jean", "date_naissance": "1950-03-12"}, EXACT)[0][0] == 1.0
+    assert index.match({"nom": "Dupond", "prénoms": "Jean Pierre", "date_naissance": "19500312"}, EXACT) == []
+
+
+def test_tolerant_orthographe_et_date():
+    data = deces("DUPONT", "JEAN PIERRE", "19500312")
+    index = index_de(data)
+    resultats = index.match({"nom": "Dupond", "prénoms": "Jean", "date_naissance": "19501203"}, TOLERANT)
+    assert [resultat[1] for resultat in resultats] == [data]
+
+
+def test_tolerant_sans_prenom_commun():
+    index = index_de(deces("DUPONT", "JEAN PIERRE", "19500312"))
+    assert index.match({"nom": "DUPONT", "prénoms": "PAUL", "date_naissance": "19500313"}, TOLERANT) == []
@@ -0,0 +1,45 @@
+import os, csv, json, shutil
+import pytest
+from config import DOWNLOAD_DIR
+from generator_deces import generate_file
+from pipeline_deces import pipeline_list, pipeline_streaming, output_paths
+from quarantine_deces import quarantine_path
+
+FILE = "deces-2024-m01.txt"
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Fichier synthétique, avec des lignes malformées et des valeurs nulles."""
+    return generate_file(str(tmp_path / FILE), 3000, seed=2)
+
+
+def executer(pipeline, source, dossier, monkeypatch):
+    """Exécute un pipeline dans son propre dossier de travail (les modes écrivent les mêmes noms de fichiers)."""
+    os.makedirs(dossier / DOWNLOAD_DIR)
+    monkeypatch.chdir(dossier)
+    FILE_PATH = DOWNLOAD_DIR + "/" + FILE
+    shutil.copy(source, FILE_PATH)
+    return pipeline(FILE, FILE_PATH), FILE_PATH
+
+
+def lire_csv(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_flux_identique_a_liste(source, tmp_path, monkeypatch):
+    compteurs_liste, FILE_PATH = executer(pipeline_list, source, tmp_path / "liste", monkeypatch)
+    data_liste = json.load(open(DOWNLOAD_DIR + "/deces-2024-m01.json", encoding="utf-8"))
+    csv_liste = lire_csv(output_paths(FILE, FILE_PATH)[1])
+    rejets_liste = open(quarantine_path(FILE), encoding="utf-8").read()
+
+    compteurs_flux, FILE_PATH = executer(pipeline_streaming, source, tmp_path / "flux", monkeypatch)
+    jsonl_file_path, csv_file_path = output_paths(FILE, FILE_PATH)
+    data_flux = [json.loads(ligne) for ligne in open(jsonl_file_path, encoding="utf-8")]
+
+    assert compteurs_flux == compteurs_liste
+    assert compteurs_flux["non_prises_en_charge"] > 0 and compteurs_flux["avec_null"] > 0
+    assert data_flux == data_liste and len(data_flux) == compteurs_flux["prises_en_charge"]
+    assert lire_csv(csv_file_path) == csv_liste
+    assert open(quarantine_path(FILE), encoding="utf-8").read() == rejets_liste
@@ -0,0 +1,53 @@
+import csv
+import pytest
+from pipeline_deces import iter_data_from_lines, init_counters
+from quarantine_deces import QuarantineWriter, merge_quarantine_parts
+from test_parser_parity import LIGNES, LIGNES_MALFORMEES
+
+RAISONS = {
+    "ligne_vide": "ligne_vide",
+    "ligne_tronquee": "ligne_tronquee",
+    "delimiteur_absent": "delimiteurs_noms_absents",
+    "nom_accentue": "noms_invalides",
+    "date_naissance_invalide": "date_naissance_invalide",
+    "sexe_invalide": "sexe_invalide",
+    "date_deces_invalide": "date_deces_invalide",
+}
+
+
+def lire_tsv(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE))
+
+
+@pytest.mark.parametrize("engine", ["regex", "colonnes"])
+def test_raisons_et_numeros_de_ligne(tmp_path, engine):
+    valide = LIGNES["commune_francaise"]
+    lignes, attendus = [], []
+    for nom, raison in RAISONS.items(): # une ligne valide puis une ligne rejetée
+        lignes += [valide, LIGNES_MALFORMEES[nom]]
+        attendus.append([str(len(lignes)), raison, LIGNES_MALFORMEES[nom].rstrip("\r\n")])
+
+    counters = init_counters()
+    path = tmp_path / "deces.rejets.tsv"
+    with QuarantineWriter(str(path), counters, buffer_size=2, log_sample=1) as quarantine:
+        data = list(iter_data_from_lines(lignes, engine, counters, quarantine))
+
+    assert len(data) == len(RAISONS)
+    assert lire_tsv(path) == [["numero_ligne", "raison", "ligne"]] + attendus
+    assert counters["non_prises_en_charge"] == len(RAISONS)
+    assert {cle: valeur for cle, valeur in counters.items() if cle.startswith("rejet_")} == {
+        "rejet_" + raison: 1 for raison in RAISONS.values()}
+
+
+def test_fusion_des_morceaux(tmp_path):
+    parts = []
+    for i, rejets in enumerate([[(2, "ligne_vide", "")], [], [(1, "sexe_invalide", "A\tB")]]):
+        path = tmp_path / f"rejets.part{i}"
+        with QuarantineWriter(str(path)) as quarantine:
+            for numero, raison, ligne in rejets:
+                quarantine.add(numero, raison, ligne)
+        parts.append(str(path))
+    merge_quarantine_parts(parts, [0, 10, 25], str(tmp_path / "rejets.tsv"))
+    assert lire_tsv(tmp_path / "rejets.tsv")[1:] == [["2", "ligne_vide", ""], ["26", "sexe_invalide", "A B"]]
+    assert not any(path.endswith(".part0") for path in map(str, tmp_path.iterdir()))
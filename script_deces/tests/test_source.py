@@ -0,0 +1,66 @@
+import gzip, zipfile
+from source_deces import split_lines, iter_line_blocks, iter_offset_blocks
+
+LIGNES = [f"LIGNE {numero:04d} " + "X" * (numero % 50) + "\n" for numero in range(500)]
+
+
+def lire(FILE_PATH, block_size=256):
+    return [ligne for lignes in iter_line_blocks(FILE_PATH, block_size) for ligne in lignes]
+
+
+def test_split_lines():
+    assert split_lines("A\nB\r\nC\rD") == ["A\n", "B\n", "C\n", "D"] # dernière ligne sans fin de ligne
+    assert split_lines("A\n") == ["A\n"]
+    assert split_lines("") == []
+    assert split_lines("A\x0cB C\n") == ["A\x0cB C\n"] # pas d'autre séparateur que les fins de ligne
+
+
+def test_txt_par_blocs(tmp_path):
+    chemin = tmp_path / "deces.txt"
+    chemin.write_text("".join(LIGNES) + "DERNIERE", encoding="utf-8")
+    assert lire(str(chemin)) == LIGNES + ["DERNIERE"]
+
+
+def test_txt_fin_de_ligne_windows(tmp_path):
+    chemin = tmp_path / "deces.txt"
+    chemin.write_bytes("".join(LIGNES).replace("\n", "\r\n").encode("utf-8"))
+    assert lire(str(chemin)) == LIGNES
+
+
+def test_txt_ligne_plus_longue_qu_un_bloc(tmp_path):
+    chemin = tmp_path / "deces.txt"
+    lignes = ["COURTE\n", "L" * 10000 + "\n", "É" * 3000 + "\n", "FIN\n"] # caractères multi-octets
+    chemin.write_text("".join(lignes), encoding="utf-8")
+    assert lire(str(chemin), block_size=100) == lignes
+
+
+def test_txt_reprise_a_un_offset(tmp_path):
+    chemin = tmp_path / "deces.txt"
+    chemin.write_text("".join(LIGNES), encoding="utf-8")
+    blocs = list(iter_offset_blocks(str(chemin), 0, 300))
+    fin, _ = blocs[3]
+    reprise = [ligne for _, lignes in iter_offset_blocks(str(chemin), fin, 300) for ligne in lignes]
+    assert reprise == [ligne for _, lignes in blocs[4:] for ligne in lignes]
+    assert blocs[-1][0] == chemin.stat().st_size
+
+
+def test_txt_vide(tmp_path):
+    chemin = tmp_path / "deces.txt"
+    chemin.write_bytes(b"")
+    assert lire(str(chemin)) == []
+
+
+def test_gz(tmp_path):
+    chemin = tmp_path / "deces.txt.gz"
+    with gzip.open(chemin, "wt", encoding="utf-8", newline="") as archive:
+        archive.write("".join(LIGNES).replace("\n", "\r\n") + "DERNIERE")
+    assert lire(str(chemin)) == LIGNES + ["DERNIERE"]
+
+
+def test_zip_plusieurs_fichiers(tmp_path):
+    chemin = tmp_path / "deces-2020.zip"
+    with zipfile.ZipFile(chemin, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("deces/", "") # dossier, ignoré
+        archive.writestr("deces/deces-2020-t1.txt", "".join(LIGNES[:200]))
+        archive.writestr("deces/deces-2020-t2.txt", "".join(LIGNES[200:]).replace("\n", "\r\n"))
+    assert lire(str(chemin)) == LIGNES
@@ -0,0 +1,17 @@
+import datetime
+from bdd_deces import to_row
+from valeurs_deces import to_null, to_date
+from test_parquet import deces
+
+
+def test_dates_et_nulls():
+    assert to_date("20240229") == datetime.date(2024, 2, 29)
+    assert [to_date(texte) for texte in ("19400100", "20230229", "2024", "null", None)] == [None] * 5
+    assert [to_null(valeur) for valeur in ("null", "Null", None, "NULL", "")] == [None, None, None, "NULL", ""]
+
+
+def test_ligne_sqlite():
+    data = dict(deces(7, 3), commune_naissance="null")
+    ligne = to_row(data, "deces-2024.txt")
+    assert ligne[3] is None and ligne[5] is None # date de naissance incomplète, commune "null"
+    assert ligne[7] == "2024-03-04"
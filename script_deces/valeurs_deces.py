@@ -0,0 +1,18 @@
+import datetime
+from functools import lru_cache
+
+VALEURS_NULLES = {None, "null", "Null"} # valeurs "null" textuelles des parsers, remplacées par de vrais nulls dans les sorties typées
+
+
+def to_null(value):
+    """Remplace une valeur "null" textuelle des parsers par None."""
+    return None if value in VALEURS_NULLES else value
+
+
+@lru_cache(maxsize=None)
+def to_date(date_texte):
+    """Convertit une date AAAAMMJJ en date, ou None si elle est incomplète ou invalide."""
+    try:
+        return datetime.date(int(date_texte[:4]), int(date_texte[4:6]), int(date_texte[6:8]))
+    except (TypeError, ValueError):
+        return None